@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Create an unstructured tetrahedral grid around a wing
+# to be meshed with gmsh for Flow or SU2 CFD solvers
+# Adrien Crovato
+
+import cache as c
+import numpy as np
+
+## Load airfoil coordinates
+# Each distinct file is parsed once per loader, and the parsed coordinates are
+# stored in a binary cache directory keyed by the hash of the file content
+#
+# Adrien Crovato
+class Loader:
+    def __init__(self, cdir=None, maxSize=64*1024*1024):
+        self.store = None if cdir is None else c.Store(cdir, maxSize) # persistent cache (none if cdir is None)
+        self.data = {} # coordinates keyed by content hash
+        self.stats = {'memory': 0, 'disk': 0, 'parsed': 0}
+
+    def load(self, fname):
+        """Return the airfoil (Selig formatted) coordinates stored in a file
+        """
+        import hashlib, io
+        file = open(fname, 'rb')
+        raw = file.read()
+        file.close()
+        key = hashlib.sha1(b'geoGen.airfoil.1\0' + raw).hexdigest()
+        # in-memory
+        if key in self.data:
+            self.stats['memory'] += 1
+            return self.data[key]
+        # on disk
+        data = self.fetch(key)
+        if data is not None:
+            self.stats['disk'] += 1
+        else:
+            data = np.loadtxt(io.BytesIO(raw), skiprows=1, ndmin=2)
+            if data.shape[1] != 2:
+                raise Exception('Loader: airfoil file', fname, 'should contain 2 columns but', data.shape[1], 'were read!\n')
+            self.stats['parsed'] += 1
+            if self.store is not None:
+                self.store.store(key, '.npy', lambda f: np.save(f, data))
+        self.data[key] = data
+        return data
+
+    def fetch(self, key):
+        """Return memory-mapped coordinates from the cache directory, None if not cached
+        """
+        if self.store is None:
+            return None
+        path = self.store.fetch(key, '.npy')
+        if path is None:
+            return None
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen benchmarks
+#
+# Compare per-point and bulk emission of wing Point/Spline records
+# Adrien Crovato
+
+import os, tempfile, time
+import synth
+import airfoil as af
+import wing as w
+import writer as wr
+import numbering as n
+
+def legacyPoints(wing, file):
+    """Per-point emission, as done before bulk formatting
+    """
+    file.write('// --- Wing points ---\n')
+    for i in range(0, wing.n):
+        file.write('// -- Airfoil {0:d}\n'.format(i))
+        ids = wing.ptsId[wing.station(i)]
+        pts = wing.ptsX[wing.station(i), :]
+        for j in range(0, ids.shape[0]-1):
+            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(ids[j], pts[j,0], pts[j,1], pts[j,2]))
+
+def legacyLines(wing, file):
+    """Per-integer emission of spline ID lists, as done before bulk formatting
+    """
+    file.write('// --- Wing lines ---\n')
+    spts = wing.sepIds()
+    for i in range(0, wing.n):
+        file.write('// -- Airfoil {0:d}\n'.format(i))
+        for j in range(0, wing.linaN[i].shape[0]-1):
+            file.write('Spline({0:d}) = {{'.format(wing.linaN[i][j]))
+            for k in range(spts[i][j], spts[i][j+1]):
+                file.write('{0:d}, '.format(k))
+            file.write('{0:d}'.format(spts[i][j+1]))
+            file.write('};\n')
+        file.write('Spline({0:d}) = {{'.format(wing.linaN[i][-1]))
+        for k in range(spts[i][wing.linaN[i].shape[0]-1], spts[i][0]+wing.ptr[i+1]-wing.ptr[i]-1):
+            file.write('{0:d}, '.format(k))
+        file.write('{0:d}'.format(spts[i][0]))
+        file.write('};\n')
+    for i in range(0, wing.n-1):
+        file.write('// -- Planform {0:d}\n'.format(i))
+        for j in range(0, wing.linpN[i].shape[0]):
+            file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(wing.linpN[i][j], spts[i][j], spts[i+1][j]))
+    file.write('\n')
+
+def timeit(fun, wing, nRep):
+    """Return the best time over nRep emissions
+    """
+    best = float('inf')
+    for k in range(0, nRep):
+        file = wr.GeoWriter(os.devnull)
+        t0 = time.perf_counter()
+        fun(wing, file)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(nSta, nPts, nRep):
+    tdir = tempfile.mkdtemp()
+    fname = os.path.join(tdir, 'naca.dat')
+    synth.writeAirfoil(fname, synth.naca(nPts))
+    p = synth.params(fname, nSta)
+    wing = w.Wing([af.Loader().load(f) for f in p['airfName']], p['span'], p['taper'], p['sweep'], p['dihedral'], p['twist'], p['rootChord'], p['offset'], n.Numbering())
+    nTot = wing.ptsX.shape[0] - wing.n
+    print('{0:d} stations x {1:d} points ({2:d} points)'.format(nSta, nPts, nTot))
+    print('{0:>10s} {1:>14s} {2:>14s} {3:>8s}'.format('stage', 'before [pt/s]', 'after [pt/s]', 'speedup'))
+    for name, old, new in [('points', legacyPoints, w.Wing.writePoints), ('splines', legacyLines, w.Wing.writeLines)]:
+        tOld = timeit(old, wing, nRep)
+        tNew = timeit(new, wing, nRep)
+        print('{0:>10s} {1:14.0f} {2:14.0f} {3:8.2f}'.format(name, nTot/tOld, nTot/tNew, tOld/tNew))
+    os.remove(fname)
+    os.rmdir(tdir)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', dest='nSta', type=int, help='number of spanwise stations', default=10)
+    parser.add_argument('-p', dest='nPts', type=int, help='number of points per airfoil (odd)', default=499)
+    parser.add_argument('-r', dest='nRep', type=int, help='number of repetitions', default=5)
+    args = parser.parse_args()
+
+    main(args.nSta, args.nPts, args.nRep)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen benchmarks
+#
+# Time each stage of the generation of synthetic wings of increasing size,
+# and compare the results with those of another revision
+# Adrien Crovato
+
+import os, shutil, tempfile, time
+import synth
+import geoGen
+import airfoil as af
+import wing as w
+import tip as t
+import wake as wk
+import domain as d
+import writer as wr
+import numbering as n
+
+def run(cfg):
+    """Generate the geometry of a config module, and return the time spent in each stage and the output size
+    """
+    times = {}
+    t0 = time.perf_counter()
+    def lap(stage):
+        nonlocal t0
+        t1 = time.perf_counter()
+        times[stage] = times.get(stage, 0.) + t1 - t0
+        t0 = t1
+    p = geoGen.getConfig(cfg)
+    lap('getConfig')
+    data = geoGen.readAirfoils(p['airfName'], af.Loader())
+    data = [data[f] for f in p['airfName']]
+    lap('readAirfoils')
+    num = n.Numbering()
+    wing = w.Wing(data, p['span'], p['taper'], p['sweep'], p['dihedral'], p['twist'], p['rootChord'], p['offset'], num)
+    lap('Wing')
+    tip = t.CTip(wing, num)
+    lap('CTip')
+    if p['domType'] == 'box':
+        wake = wk.Wake(p['xoBox'], p['xfBox'], p['yfBox'], p['nSlope'], wing, tip, num)
+        lap('Wake')
+        dom = d.Box(p['xoBox'], p['xfBox'], p['yfBox'], p['zoBox'], p['zfBox'], wing, tip, wake, num)
+        lap('Box')
+    else:
+        wake = wk.GWake()
+        dom = d.Sphere(p['rSphere'], wing, tip, num)
+        lap('Sphere')
+    outFile = wr.GeoWriter(cfg + '.geo')
+    for section in geoGen.walk(outFile, cfg, wing, tip, wake, dom):
+        lap('write ' + section)
+    size = outFile.size
+    outFile.close()
+    lap('close')
+    return times, size
+
+def case(tdir, nSta, nPts, domType, nRep):
+    """Benchmark one synthetic wing, returning the best time of each stage over nRep runs, the peak memory and the output size
+    """
+    import tracemalloc
+    synth.writeAirfoil(os.path.join(tdir, 'naca.dat'), synth.naca(nPts))
+    cfg = os.path.join(tdir, 'cfg_{0:d}_{1:d}_{2:s}'.format(nSta, nPts, domType))
+    synth.writeConfig(cfg + '.py', synth.params(os.path.join(tdir, 'naca.dat'), nSta, domType))
+    best = {}
+    for k in range(0, nRep):
+        times, size = run(cfg)
+        for s in times:
+            best[s] = min(best.get(s, float('inf')), times[s])
+    # peak memory, measured in a separate run since tracing slows down allocations
+    tracemalloc.start()
+    run(cfg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best['total'] = sum(best.values())
+    return {'nSta': nSta, 'nPts': nPts, 'domType': domType, 'time': best, 'peakMem': peak, 'size': size}
+
+def meta():
+    """Return the description of the revision and platform being benchmarked
+    """
+    import platform, subprocess
+    import numpy as np
+    try:
+        rev = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ''
+    return {'revision': rev, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform()}
+
+def compare(res, base, threshold):
+    """Print the ratio of the stage times to those of a base result, and return the number of regressions
+    A stage regresses if it is slower by more than threshold, and by more than a millisecond
+    """
+    nReg = 0
+    cases = {(c['nSta'], c['nPts'], c['domType']): c for c in base['cases']}
+    print('Compared to', base['meta']['revision'], '(ratio of times, new/base)')
+    for c in res['cases']:
+        b = cases.get((c['nSta'], c['nPts'], c['domType']))
+        if b is None:
+            continue
+        print('{0:d} stations x {1:d} points, {2:s}'.format(c['nSta'], c['nPts'], c['domType']))
+        for s in c['time']:
+            if s in b['time']:
+                ratio = c['time'][s] / max(b['time'][s], 1e-9)
+                slow = ratio > threshold and c['time'][s] - b['time'][s] > 1e-3
+                nReg += slow
+                print('  {0:>20s} {1:8.2f}{2:s}'.format(s, ratio, '  REGRESSION' if slow else ''))
+        print('  {0:>20s} {1:8.2f}'.format('peak memory', c['peakMem'] / max(b['peakMem'], 1)))
+        print('  {0:>20s} {1:8.2f}'.format('output size', c['size'] / max(b['size'], 1)))
+    return nReg
+
+def main(nSta, nPts, domTypes, nRep, output, base, threshold):
+    import json
+    tdir = tempfile.mkdtemp()
+    res = {'meta': meta(), 'cases': []}
+    try:
+        for dt in domTypes:
+            for ns in nSta:
+                for np_ in nPts:
+                    c = case(tdir, ns, np_, dt, nRep)
+                    res['cases'].append(c)
+                    print('{0:4d} stations x {1:5d} points, {2:6s}: {3:8.3f}s, {4:8.1f}MB peak, {5:8.1f}MB written'.format(ns, np_, dt, c['time']['total'], c['peakMem']/1e6, c['size']/1e6))
+    finally:
+        shutil.rmtree(tdir)
+    if output:
+        file = open(output, 'w')
+        json.dump(res, file, indent=1)
+        file.close()
+        print(output, 'has been successfully written!')
+    if base:
+        file = open(base, 'r')
+        nReg = compare(res, json.load(file), threshold)
+        file.close()
+        if nReg:
+            print(nReg, 'regression(s) found!')
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    import argparse, sys
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', dest='nSta', type=int, nargs='+', help='numbers of spanwise stations', default=[3, 30, 300])
+    parser.add_argument('-p', dest='nPts', type=int, nargs='+', help='numbers of points per airfoil (odd)', default=[101, 1001])
+    parser.add_argument('-d', dest='domTypes', nargs='+', choices=['box', 'sphere'], help='domain types', default=['box', 'sphere'])
+    parser.add_argument('-r', dest='nRep', type=int, help='number of repetitions', default=3)
+    parser.add_argument('-o', dest='output', help='output .json file')
+    parser.add_argument('--compare', dest='base', help='.json results of another revision to compare with')
+    parser.add_argument('--threshold', type=float, help='time ratio above which a stage is reported as a regression', default=1.25)
+    args = parser.parse_args()
+
+    sys.exit(main(args.nSta, args.nPts, args.domTypes, args.nRep, args.output, args.base, args.threshold))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen benchmarks
+#
+# Synthetic airfoils and wings of arbitrary size
+# Adrien Crovato
+
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+
+def naca(nPts, t=0.12):
+    """Return a closed, Selig-formatted NACA 00xx airfoil of nPts (odd) points
+    """
+    nHalf = (nPts - 1) // 2
+    x = 0.5 * (1 + np.cos(np.linspace(0, np.pi, nHalf+1))) # TE to LE, cosine spacing
+    z = 5*t * (0.2969*np.sqrt(x) - 0.1260*x - 0.3516*x**2 + 0.2843*x**3 - 0.1036*x**4)
+    z[0] = 0.
+    return np.vstack((np.column_stack((x, z)), np.column_stack((x[-2::-1], -z[-2::-1]))))
+
+def writeAirfoil(fname, pts):
+    """Write airfoil coordinates in Selig format
+    """
+    np.savetxt(fname, pts, fmt='%.6f', header='NACA{0:d}'.format(pts.shape[0]), comments='')
+
+def params(airfName, nSta, domType='box'):
+    """Return a geoGen parameter dictionary for a wing of nSta stations
+    """
+    p = {}
+    p['airfName'] = [airfName] * nSta
+    p['span'] = [2. / (nSta-1)] * (nSta-1)
+    p['taper'] = [0.4 ** (1. / (nSta-1))] * (nSta-1)
+    p['sweep'] = [20.] * (nSta-1)
+    p['dihedral'] = [1.] * (nSta-1)
+    p['twist'] = list(np.linspace(1., -1., nSta))
+    p['rootChord'] = 1.0
+    p['offset'] = [0., 0.]
+    p['coWingtip'] = True
+    p['domType'] = domType
+    p['rSphere'] = 50.
+    p['xoBox'] = -3.5
+    p['xfBox'] = 4.5
+    p['yfBox'] = 4.
+    p['zoBox'] = -3.5
+    p['zfBox'] = 3.5
+    p['nSlope'] = 10
+    return p
+
+def writeConfig(fname, p):
+    """Write a geoGen config module returning a parameter dictionary, the airfoils being next to it
+    """
+    import json
+    q = dict(p)
+    q['airfPath'] = '.'
+    q['airfName'] = [os.path.basename(f) for f in p['airfName']]
+    file = open(fname, 'w')
+    file.write('#!/usr/bin/env python\n# -*- coding: utf-8 -*-\n#\n## Synthetic configuration module for geoGen\n\n')
+    file.write('def getParams():\n    return {0:s}\n'.format(repr(json.loads(json.dumps(q, default=float)))))
+    file.close()
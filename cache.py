@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Create an unstructured tetrahedral grid around a wing
+# to be meshed with gmsh for Flow or SU2 CFD solvers
+# Adrien Crovato
+
+def cacheDir(sub):
+    """Return the default cache subdirectory ($GEOGEN_CACHE, or ~/.cache/geoGen), None if disabled
+    """
+    import os
+    cdir = os.environ.get('GEOGEN_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'geoGen'))
+    return os.path.join(cdir, sub) if cdir else None
+
+## Size-bounded directory of files keyed by hash
+# Entries are written atomically, so that the directory can be shared by concurrent processes,
+# and the least recently used entries are evicted when the directory grows too large
+#
+# Adrien Crovato
+class Store:
+    def __init__(self, cdir, maxSize):
+        self.cdir = cdir # cache directory
+        self.maxSize = maxSize # maximum size of the cache directory (bytes)
+
+    def path(self, key, ext):
+        """Return the path of an entry
+        """
+        import os
+        return os.path.join(self.cdir, key + ext)
+
+    def fetch(self, key, ext):
+        """Return the path of an entry and mark it as recently used, None if not cached
+        """
+        import os
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, key, ext, save):
+        """Atomically add an entry, written by save(file) to a binary file, then evict old entries
+        Return False if the entry could not be written
+        """
+        import os, uuid
+        tmp = os.path.join(self.cdir, '.{0:s}{1:s}.{2:s}.tmp'.format(key, ext, uuid.uuid4().hex))
+        try:
+            os.makedirs(self.cdir, exist_ok=True)
+            file = open(tmp, 'xb')
+            try:
+                save(file)
+            finally:
+                file.close()
+            os.replace(tmp, self.path(key, ext))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        self.evict()
+        return True
+
+    def place(self, key, ext, dest):
+        """Atomically place an entry at dest, as a hard link when possible (copied otherwise), and mark it as recently used
+        Return False if the entry is not cached, or could not be placed (e.g. evicted meanwhile by another process)
+        """
+        import os, shutil, uuid
+        path = self.fetch(key, ext)
+        if path is None:
+            return False
+        dname, bname = os.path.split(os.path.abspath(dest))
+        tmp = os.path.join(dname, '.{0:s}.{1:s}.tmp'.format(bname, uuid.uuid4().hex))
+        try:
+            try:
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, dest)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        return True
+
+    def evict(self):
+        """Remove the least recently used entries until the cache directory fits in maxSize
+        """
+        import os
+        entries = []
+        for f in os.listdir(self.cdir):
+            if not f.startswith('.'):
+                try:
+                    st = os.stat(os.path.join(self.cdir, f))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, f))
+        entries.sort()
+        size = sum([e[1] for e in entries])
+        for e in entries:
+            if size <= self.maxSize:
+                break
+            try:
+                os.remove(os.path.join(self.cdir, e[2]))
+            except OSError:
+                pass
+            size -= e[1]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Send geometry requests to a running geoGen server (python geoGen.py --serve),
+# importing nothing but the standard library so that it starts quickly
+# Adrien Crovato
+
+def socketPath():
+    """Return the default server socket ($GEOGEN_SOCKET, or a per-user socket in the temporary directory)
+    """
+    import os, tempfile
+    return os.environ.get('GEOGEN_SOCKET', os.path.join(tempfile.gettempdir(), 'geoGen-{0:d}.sock'.format(os.getuid())))
+
+def request(req, path=None):
+    """Send a request (dictionary) to the server and return its response
+    """
+    import json, socket
+    sock = socket.socket(socket.AF_UNIX)
+    try:
+        sock.connect(socketPath() if path is None else path)
+        sock.sendall((json.dumps(req) + '\n').encode())
+        file = sock.makefile('rb')
+        line = file.readline()
+        file.close()
+    finally:
+        sock.close()
+    if not line:
+        raise Exception('client: the server closed the connection without answering!\n')
+    resp = json.loads(line)
+    if 'error' in resp:
+        raise Exception(resp['error'])
+    return resp
+
+def main(_module, _output, over=None, path=None, strict=False):
+    import os, sys
+    req = {'config': os.path.abspath(_module), 'params': {} if over is None else over, 'cwd': os.getcwd(), 'strict': strict}
+    if _output == '-':
+        resp = request(req, path)
+        for e in resp.get('warnings', []):
+            print('Warning:', e, file=sys.stderr)
+        sys.stdout.write(resp['geo'])
+        return
+    wdir = os.path.join(os.getcwd(), 'workspace')
+    os.makedirs(wdir, exist_ok=True)
+    req['output'] = os.path.join(wdir, _output)
+    resp = request(req, path)
+    print(resp['file'], 'has been successfully written!')
+    for e in resp.get('warnings', []):
+        print('Warning:', e)
+
+if __name__ == "__main__":
+    # Arguments parser
+    import argparse, json
+    parser = argparse.ArgumentParser()
+    parser.add_argument('file', help='input config file (.py, .json or .toml)')
+    parser.add_argument('-o', dest='out', help='output .geo file, - for stdout', default='grid.geo')
+    parser.add_argument('-p', dest='params', action='append', default=[], metavar='NAME=JSON', help='override a parameter of the config, e.g. -p "twist=[1, 0, -1]"')
+    parser.add_argument('--strict', action='store_true', help='fail if the built geometry is invalid (otherwise only warn)')
+    parser.add_argument('--socket', help='server socket (default: $GEOGEN_SOCKET, or a per-user socket in the temporary directory)')
+    args = parser.parse_args()
+
+    over = {}
+    for a in args.params:
+        k, sep, v = a.partition('=')
+        if not sep:
+            parser.error('parameter overrides should be given as NAME=JSON')
+        over[k] = json.loads(v)
+    main(args.file[:-3] if args.file.endswith('.py') else args.file, args.out, over, args.socket, args.strict)
@@ -29,16 +29,63 @@ import numpy as np
 #
 # Adrien Crovato
 class Domain:
-    def __init__(self, _wing, _tip):
+    def __init__(self, _wing, _tip, _num, fields=False, _bodies=None):
         self.wing = _wing
         self.tip = _tip
+        self.num = _num
+        self.fields = fields # refine the mesh near the wing (and wake) with background size fields
+        self.bodies = [] if _bodies is None else _bodies # additional bodies, as (wing, wingtip) pairs
+
+    def wings(self):
+        """Return the wings of all the bodies
+        """
+        return [self.wing] + [b[0] for b in self.bodies]
+
+    def bodySurfaces(self, body):
+        """Return the surfaces of the planforms and of the wingtip of an additional body
+        """
+        wing, tip = body
+        return [wing.surN[i][j] for i in range(0, wing.n-1) for j in range(0, 6)] + list(tip.surN[0][0:6])
+
+    def writeRootLoops(self, file, loopN):
+        """Write the line loops of the root airfoils of the additional bodies, defining holes in the symmetry plane
+        """
+        for k in range(0, len(self.bodies)):
+            file.loop(loopN[k], self.bodies[k][0].linaN[0][0:6])
+
+    def writeFieldOpts(self, file):
+        """Write the mesh sizes used by the background size fields, derived from the mean chord
+        """
+        cm = self.wing.S / self.wing.b
+        file.constant('msEdge', cm/100, 'Leading and trailing edge mesh size (size fields)')
+        file.constant('msNear', cm/10, 'Near-field and wake mesh size (size fields)')
+
+    def writeEdgeFields(self, file, fldN):
+        """Write the distance and threshold fields refining the mesh along the leading and trailing edges (4 fields)
+        """
+        cm = self.wing.S / self.wing.b
+        nS = int(np.ceil(max([np.max(np.diff(w.spanPos)) for w in self.wings()]) / (cm/20))) + 1 # sampling finer than the threshold distance
+        file.write('// -- Trailing and leading edges\n')
+        for i, j in enumerate([0, 3]):
+            file.field(fldN[2*i], 'Distance', [('CurvesList', [w.linpN[k][j] for w in self.wings() for k in range(0, w.n-1)]), ('Sampling', nS)])
+            file.field(fldN[2*i+1], 'Threshold', [('InField', fldN[2*i]), ('SizeMin', 'msEdge'), ('SizeMax', 'msF'), ('DistMin', cm/20), ('DistMax', cm)])
+
+    def writeNearField(self, file, fldN):
+        """Write the box field refining the mesh around the wings, from one chord upstream to two chords downstream (1 field)
+        """
+        cm = self.wing.S / self.wing.b
+        pts = np.concatenate([w.ptsX for w in self.wings()])
+        lo = np.min(pts, axis=0) - 0.5*cm
+        hi = np.max(pts, axis=0) + 0.5*cm
+        file.write('// -- Near field\n')
+        file.field(fldN[0], 'Box', [('VIn', 'msNear'), ('VOut', 'msF'), ('XMin', lo[0]-0.5*cm), ('XMax', hi[0]+1.5*cm), ('YMin', 0.), ('YMax', hi[1]), ('ZMin', lo[2]), ('ZMax', hi[2]), ('Thickness', cm)])
 
 ## Handle sphere data
 #
 # Adrien Crovato
 class Sphere(Domain):
-    def __init__(self, R, _wing, _tip):
-        Domain.__init__(self, _wing, _tip)
+    def __init__(self, R, _wing, _tip, _num, fields=False, _bodies=None):
+        Domain.__init__(self, _wing, _tip, _num, fields, _bodies)
         self.initData(R)
 
     def initData(self, R):
@@ -50,113 +97,115 @@ class Sphere(Domain):
                               [-R+self.wing.chord[0], 0., 0.],
                               [0., 0., -R]]),
                     np.array([[self.wing.chord[0], R, 0.]])]
-        self.ptsN = [np.array([5001]), np.arange(5002, 5006), np.array([5007])]
+        self.ptsN = [self.num.points(1), self.num.points(4), self.num.points(1)]
+
+        # lines (2*4 lines)
+        self.linN = [self.num.lines(4), self.num.lines(4)]
+
+        # surface (5 surfaces) AND line loop (1 wing root hole in symmetry plane for each body)
+        self.surN = [self.num.surfaces(5)]
+        self.loopN = [self.num.loops(1+len(self.bodies))]
 
-        # lines (2*4 lines: 191-194 and 195-198)
-        self.linN = [np.arange(191, 195), np.arange(195, 199)]
+        # volume (1 volume)
+        self.volN = [self.num.volumes(1)]
 
-        # surface (5 surfaces: 111-115)
-        self.surN = [np.arange(111, 116)]
+        # size fields (4 edge fields, 1 near field and their minimum)
+        if self.fields:
+            self.fldN = [self.num.fields(6)]
 
-    def writeInfo(self, fname):
+    def writeInfo(self, file):
         """Write sphere geometrical parameters
         """
-        file = open(fname, 'a')
         file.write('// --- Domain geometry ---\n')
-        file.write('// Sphere radius: {0:f}\n'.format(self.pts[0][0,0]-self.wing.pts[1][0,0]))
+        file.write('// Sphere radius: {0:f}\n'.format(self.pts[0][0,0]-self.wing.ptsX[self.wing.ptr[1],0]))
         file.write('\n')
-        file.close()
 
-    def writeOpts(self, fname):
+    def writeOpts(self, file):
         """Write sphere gmsh options
         """
-        file = open(fname, 'a')
         file.write('// --- Domain options ---\n')
-        file.write('DefineConstant[ msF = {{ {0:f}, Name "Farfield mesh size" }} ];\n'.format(10*self.wing.chord[0]))
+        file.constant('msF', 10*self.wing.chord[0], 'Farfield mesh size')
+        if self.fields:
+            self.writeFieldOpts(file)
         file.write('\n')
-        file.close()
 
-    def writePoints(self, fname):
+    def writePoints(self, file):
         """Write sphere points
         """
-        file = open(fname, 'a')
         file.write('// --- Sphere points ---\n')
         file.write('// --- Center\n')
-        file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},msF}};\n'.format(self.ptsN[0][0], self.pts[0][0,0], self.pts[0][0,1], self.pts[0][0,2]))
+        file.points(self.ptsN[0], self.pts[0], 'msF')
         file.write('// --- Farfield\n')
-        for j in range(0,4):
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},msF}};\n'.format(self.ptsN[1][j], self.pts[1][j,0], self.pts[1][j,1], self.pts[1][j,2]))
-        file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},msF}};\n'.format(self.ptsN[2][0], self.pts[2][0,0], self.pts[2][0,1], self.pts[2][0,2]))
+        file.points(self.ptsN[1], self.pts[1], 'msF')
+        file.points(self.ptsN[2], self.pts[2], 'msF')
         file.write('\n')
-        file.close()
 
-    def writeLines(self, fname):
+    def writeLines(self, file):
         """Write sphere lines
         """
-        file = open(fname, 'a')
         file.write('// --- Sphere lines ---\n')
         for j in range(0, 4):
-            file.write('Circle({0:d}) = {{{1:d},{2:d},{3:d}}};\n'.format(self.linN[0][j], self.ptsN[1][j], self.ptsN[0][0], self.ptsN[1][np.mod(j+1,4)]))
+            file.circle(self.linN[0][j], self.ptsN[1][j], self.ptsN[0][0], self.ptsN[1][np.mod(j+1,4)])
         for j in range(0, 4):
-            file.write('Circle({0:d}) = {{{1:d},{2:d},{3:d}}};\n'.format(self.linN[1][j], self.ptsN[1][j], self.ptsN[0][0], self.ptsN[2][0]))
+            file.circle(self.linN[1][j], self.ptsN[1][j], self.ptsN[0][0], self.ptsN[2][0])
         file.write('\n')
-        file.close()
 
-    def writeSurfaces(self, fname):
+    def writeSurfaces(self, file):
         """Write sphere surfaces
         """
-        file = open(fname, 'a')
         file.write('// --- Sphere surfaces ---\n')
         # line loops
         for j in range(0, 4):
-            file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d}}};\n'.format(self.surN[0][j], self.linN[0][j], self.linN[1][np.mod(j+1,4)], -self.linN[1][j]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d}}};\n'.format(self.surN[0][-1], self.linN[0][0], self.linN[0][1], self.linN[0][2], self.linN[0][3]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d},{5:d},{6:d}}};\n'.format(self.surN[0][-1]+1, self.wing.linaN[0][0], self.wing.linaN[0][1], self.wing.linaN[0][2], self.wing.linaN[0][3], self.wing.linaN[0][4], self.wing.linaN[0][5]))
+            file.loop(self.surN[0][j], [self.linN[0][j], self.linN[1][np.mod(j+1,4)], -self.linN[1][j]])
+        file.loop(self.surN[0][-1], [self.linN[0][0], self.linN[0][1], self.linN[0][2], self.linN[0][3]])
+        file.loop(self.loopN[0][0], [self.wing.linaN[0][0], self.wing.linaN[0][1], self.wing.linaN[0][2], self.wing.linaN[0][3], self.wing.linaN[0][4], self.wing.linaN[0][5]])
+        self.writeRootLoops(file, self.loopN[0][1:])
         # surfaces
         for j in range(0, 4):
-            file.write('Surface({0:d}) = {{{0:d}}};\n'.format(self.surN[0][j]))
-        file.write('Plane Surface({0:d}) = {{{0:d},{1:d}}};\n'.format(self.surN[0][-1], self.surN[0][-1]+1))
+            file.surface(self.surN[0][j], [self.surN[0][j]])
+        file.planeSurface(self.surN[0][-1], [self.surN[0][-1]] + list(self.loopN[0]))
         file.write('\n')
-        file.close()
 
-    def writeVolumes(self, fname):
+    def writeVolumes(self, file):
         """Write computational volume
         """
-        file = open(fname, 'a')
         file.write('// --- Computational volumes ---\n')
         # surface loops
-        file.write('Surface Loop({0:d}) = {{'.format(1))
-        for i in range(0, self.wing.n-1):
-            for j in range(0, 6):
-                file.write('{0:d},'.format(self.wing.surN[i][j]))
-        for j in range(0, 6):
-            file.write('{0:d},'.format(self.tip.surN[0][j]))
-        for j in range(0, 4):
-            file.write('{0:d},'.format(self.surN[0][j]))
-        file.write('{0:d}}};\n'.format(self.surN[0][-1]))
-        
+        sids = [self.wing.surN[i][j] for i in range(0, self.wing.n-1) for j in range(0, 6)] + list(self.tip.surN[0][0:6]) + list(self.surN[0][0:4]) + [self.surN[0][-1]]
+        for b in self.bodies:
+            sids += self.bodySurfaces(b)
+        file.surfaceLoop(self.volN[0][0], sids)
+
         # volumes
-        file.write('Volume({0:d}) = {{{0:d}}};\n'.format(1))
+        file.volume(self.volN[0][0], [self.volN[0][0]])
         file.write('\n')
-        file.close()
 
-    def writePhysical(self, fname):
+    def writePhysical(self, file):
         """Write sphere physical groups
         """
-        file = open(fname, 'a')
         file.write('// --- Box physical groups ---\n')
-        file.write('Physical Surface("symmetry") = {{{0:d}}};\n'.format(self.surN[0][-1]))
-        file.write('Physical Surface("farfield") = {{{0:d},{1:d},{2:d},{3:d}}};\n'.format(self.surN[0][0],self.surN[0][1],self.surN[0][2],self.surN[0][3]))
-        file.write('Physical Volume("field") = {{{0:d}}};\n'.format(1))
+        file.physical('Surface', 'symmetry', [self.surN[0][-1]])
+        file.physical('Surface', 'farfield', self.surN[0][0:4])
+        file.physical('Volume', 'field', [self.volN[0][0]])
+        file.write('\n')
+
+    def writeFields(self, file):
+        """Write sphere mesh size fields
+        """
+        file.write('// --- Mesh size fields ---\n')
+        self.writeEdgeFields(file, self.fldN[0][0:4])
+        self.writeNearField(file, self.fldN[0][4:5])
+        file.write('// -- Background\n')
+        file.field(self.fldN[0][5], 'Min', [('FieldsList', self.fldN[0][[1, 3, 4]])])
+        file.backgroundField(self.fldN[0][5])
         file.write('\n')
-        file.close()
 
 ## Handle box data
 #
 # Adrien Crovato
 class Box(Domain):
-    def __init__(self, xO, xF, yF, zO, zF, _wing, _tip, _wake):
-        Domain.__init__(self, _wing, _tip)
+    def __init__(self, xO, xF, yF, zO, zF, _wing, _tip, _wake, _num, fields=False, _bodies=None):
+        Domain.__init__(self, _wing, _tip, _num, fields, _bodies)
         self.wake = _wake
 
         self.initData(xO, xF, yF, zO, zF)
@@ -172,157 +221,166 @@ class Box(Domain):
                               [xO, yF, zF],
                               [xO, yF, zO],
                               [xF, yF, zO]])]
-        self.ptsN = [np.arange(5001, 5005), np.arange(5005, 5009)]
+        self.ptsN = [self.num.points(4), self.num.points(4)]
+
+        # line numbering (2*6 x lines) AND (4 y lines)
+        self.linxN = [self.num.lines(6), self.num.lines(6)]
+        self.linyN = [self.num.lines(4)]
+
+        # surface numbering (10 surfaces)
+        self.surN = [self.num.surfaces(10)]
 
-        # line numbering (2*6 x lines: 191-203) AND (4 y lines: 205-209)
-        self.linxN = [np.arange(191, 197), np.arange(197, 204)]
-        self.linyN = [np.arange(205, 210)]
+        # volume numbering (2 volumes: upper and lower)
+        self.volN = [self.num.volumes(2)]
 
-        # surface numbering (10 surfaces: 111-120)
-        self.surN = [np.arange(111, 121)]
+        # line loop numbering (1 root hole in symmetry plane for each additional body)
+        self.loopN = [self.num.loops(len(self.bodies))]
+        # volume containing each additional body (0 above the wake, 1 below), from its root airfoil
+        # the wake meets the symmetry plane along the root airfoil, and upstream and downstream lines
+        le = self.wing.ptsX[self.wing.sptsNl[0][3],:]
+        te = self.wing.ptsX[0,:]
+        x = [xO, le[0], te[0], xF]
+        z = [le[2], le[2], te[2], self.wake.pts[0][0,2]]
+        self.side = []
+        for wing, tip in self.bodies:
+            root = wing.ptsX[wing.station(0), :]
+            above = root[:,2] > np.interp(root[:,0], x, z)
+            if np.all(above) or not np.any(above):
+                self.side.append(0 if above[0] else 1)
+            else:
+                raise Exception('Box: body', wing.name, 'crosses the wake of the main wing!\n')
 
-    def writeInfo(self, fname):
+        # size field numbering (4 edge fields, 2 wake fields, 1 near field and their minimum)
+        if self.fields:
+            self.fldN = [self.num.fields(8)]
+
+    def writeInfo(self, file):
         """Write box geometrical parameters
         """
-        file = open(fname, 'a')
         file.write('// --- Domain geometry ---\n')
         file.write('// Box length: {0:f}\n'.format(self.pts[0][0,0]-self.pts[0][1,0]))
         file.write('// Box width: {0:f}\n'.format(self.pts[1][0,1]))
         file.write('// Box height: {0:f}\n'.format(self.pts[0][0,2]-self.pts[0][3,2]))
         file.write('\n')
-        file.close()
 
-    def writeOpts(self, fname):
+    def writeOpts(self, file):
         """Write box gmsh options
         """
-        file = open(fname, 'a')
         file.write('// --- Domain options ---\n')
-        file.write('DefineConstant[ msF = {{ {0:f}, Name "Farfield mesh size" }} ];\n'.format(0.5*self.wing.chord[0]))
+        if self.fields:
+            # the size fields resolve the wing and the wake, so that the farfield size only depends on the box size
+            ext = np.max(np.abs(self.pts[1][0,:] - self.pts[0][2,:]))
+            file.constant('msF', max(0.5*self.wing.chord[0], 0.1*ext), 'Farfield mesh size')
+            self.writeFieldOpts(file)
+        else:
+            file.constant('msF', 0.5*self.wing.chord[0], 'Farfield mesh size')
         file.write('\n')
-        file.close()
 
-    def writePoints(self, fname):
+    def writePoints(self, file):
         """Write box points
         """
-        file = open(fname, 'a')
         file.write('// --- Box points ---\n')
         for i in range(0, 2):
-            for j in range(0,4):
-                file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},msF}};\n'.format(self.ptsN[i][j], self.pts[i][j,0], self.pts[i][j,1], self.pts[i][j,2]))
+            file.points(self.ptsN[i], self.pts[i], 'msF')
         file.write('\n')
 
-    def writeLines(self, fname):
+    def writeLines(self, file):
         """Write box lines
         """
-        file = open(fname, 'a')
         file.write('// --- Box lines ---\n')
         file.write('// -- Symmetry\n')
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[0][0], self.wake.ptsN[0][0], self.ptsN[0][0]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[0][1], self.ptsN[0][0], self.ptsN[0][1]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[0][2], self.ptsN[0][1], self.wake.ptsN[0][-1]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[0][3], self.wake.ptsN[0][-1], self.ptsN[0][2]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[0][4], self.ptsN[0][2], self.ptsN[0][3]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[0][5], self.ptsN[0][3], self.wake.ptsN[0][0]))
+        file.line(self.linxN[0][0], self.wake.ptsN[0][0], self.ptsN[0][0])
+        file.line(self.linxN[0][1], self.ptsN[0][0], self.ptsN[0][1])
+        file.line(self.linxN[0][2], self.ptsN[0][1], self.wake.ptsN[0][-1])
+        file.line(self.linxN[0][3], self.wake.ptsN[0][-1], self.ptsN[0][2])
+        file.line(self.linxN[0][4], self.ptsN[0][2], self.ptsN[0][3])
+        file.line(self.linxN[0][5], self.ptsN[0][3], self.wake.ptsN[0][0])
         file.write('// -- Back\n')
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[1][0], self.wake.ptsN[0][self.wing.n], self.ptsN[1][0]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[1][1], self.ptsN[1][0], self.ptsN[1][1]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[1][2], self.ptsN[1][1], self.wake.ptsN[0][self.wing.n+5]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[1][3], self.wake.ptsN[0][self.wing.n+5], self.ptsN[1][2]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[1][4], self.ptsN[1][2], self.ptsN[1][3]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linxN[1][5], self.ptsN[1][3], self.wake.ptsN[0][self.wing.n]))
+        file.line(self.linxN[1][0], self.wake.ptsN[0][self.wing.n], self.ptsN[1][0])
+        file.line(self.linxN[1][1], self.ptsN[1][0], self.ptsN[1][1])
+        file.line(self.linxN[1][2], self.ptsN[1][1], self.wake.ptsN[0][self.wing.n+5])
+        file.line(self.linxN[1][3], self.wake.ptsN[0][self.wing.n+5], self.ptsN[1][2])
+        file.line(self.linxN[1][4], self.ptsN[1][2], self.ptsN[1][3])
+        file.line(self.linxN[1][5], self.ptsN[1][3], self.wake.ptsN[0][self.wing.n])
         file.write('// -- Transverse\n')
         for i in range(0, 4):
-            file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linyN[0][i], self.ptsN[0][i], self.ptsN[1][i]))
+            file.line(self.linyN[0][i], self.ptsN[0][i], self.ptsN[1][i])
         file.write('\n')
-        file.close()
 
-    def writeSurfaces(self, fname):
+    def writeSurfaces(self, file):
         """Write box surfaces
         """
-        file = open(fname, 'a')
         file.write('// --- Box surfaces ---\n')
         # line loops
         file.write('// -- Symmetry\n')
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d},{5:d},{6:d},{7:d},{8:d}}};\n'.format(self.surN[0][0], self.wing.linaN[0][0], self.wing.linaN[0][1], self.wing.linaN[0][2], self.wake.linN[1][-1], -self.linxN[0][2], -self.linxN[0][1], -self.linxN[0][0], -self.wake.linN[1][0]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d},{5:d},{6:d},{7:d},{8:d}}};\n'.format(self.surN[0][1], self.wing.linaN[0][3], self.wing.linaN[0][4], self.wing.linaN[0][5], self.wake.linN[1][0], -self.linxN[0][5], -self.linxN[0][4], -self.linxN[0][3], -self.wake.linN[1][-1]))
+        file.loop(self.surN[0][0], [self.wing.linaN[0][0], self.wing.linaN[0][1], self.wing.linaN[0][2], self.wake.linN[1][-1], -self.linxN[0][2], -self.linxN[0][1], -self.linxN[0][0], -self.wake.linN[1][0]])
+        file.loop(self.surN[0][1], [self.wing.linaN[0][3], self.wing.linaN[0][4], self.wing.linaN[0][5], self.wake.linN[1][0], -self.linxN[0][5], -self.linxN[0][4], -self.linxN[0][3], -self.wake.linN[1][-1]])
         file.write('// -- Downstream\n')
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},'.format(self.surN[0][2], self.linyN[0][0], -self.linxN[1][0]))
-        for i in range(0, self.wing.n):
-            file.write('{0:d},'.format(-self.wake.linN[0][self.wing.n-i-1]))
-        file.write('{0:d}}};\n'.format(self.linxN[0][0]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},'.format(self.surN[0][3], -self.linyN[0][3], self.linxN[0][5]))
-        for i in range(0, self.wing.n):
-            file.write('{0:d},'.format(self.wake.linN[0][i]))
-        file.write('{0:d}}};\n'.format(-self.linxN[1][5]))
+        file.loop(self.surN[0][2], [self.linyN[0][0], -self.linxN[1][0]] + [-self.wake.linN[0][self.wing.n-i-1] for i in range(0, self.wing.n)] + [self.linxN[0][0]])
+        file.loop(self.surN[0][3], [-self.linyN[0][3], self.linxN[0][5]] + [self.wake.linN[0][i] for i in range(0, self.wing.n)] + [-self.linxN[1][5]])
         file.write('// -- Farfield\n')
         # upstream
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},'.format(self.surN[0][4], -self.linyN[0][1], self.linxN[0][2]))
-        for i in range(0, self.wing.n):
-            file.write('{0:d},'.format(-self.wake.linN[0][-i-1]))
-        file.write('{0:d}}};\n'.format(-self.linxN[1][2]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},'.format(self.surN[0][5], self.linyN[0][2], -self.linxN[1][3]))
-        for i in range(0, self.wing.n):
-            file.write('{0:d},'.format(self.wake.linN[0][-self.wing.n+i]))
-        file.write('{0:d}}};\n'.format(self.linxN[0][3]))
+        file.loop(self.surN[0][4], [-self.linyN[0][1], self.linxN[0][2]] + [-self.wake.linN[0][-i-1] for i in range(0, self.wing.n)] + [-self.linxN[1][2]])
+        file.loop(self.surN[0][5], [self.linyN[0][2], -self.linxN[1][3]] + [self.wake.linN[0][-self.wing.n+i] for i in range(0, self.wing.n)] + [self.linxN[0][3]])
         # back
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d},{5:d},{6:d},{7:d},{8:d}}};\n'.format(self.surN[0][6], self.linxN[1][0], self.linxN[1][1], self.linxN[1][2], -self.wake.linN[0][self.wing.n+4], -self.wake.linN[0][self.wing.n+3], -self.wake.linN[0][self.wing.n+2], -self.wake.linN[0][self.wing.n+1], -self.wake.linN[0][self.wing.n]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d},{5:d},{6:d},{7:d},{8:d}}};\n'.format(self.surN[0][7], self.linxN[1][3], self.linxN[1][4], self.linxN[1][5], self.wake.linN[0][self.wing.n], self.wake.linN[0][self.wing.n+1], self.wake.linN[0][self.wing.n+2], self.wake.linN[0][self.wing.n+3], self.wake.linN[0][self.wing.n+4]))
+        file.loop(self.surN[0][6], [self.linxN[1][0], self.linxN[1][1], self.linxN[1][2], -self.wake.linN[0][self.wing.n+4], -self.wake.linN[0][self.wing.n+3], -self.wake.linN[0][self.wing.n+2], -self.wake.linN[0][self.wing.n+1], -self.wake.linN[0][self.wing.n]])
+        file.loop(self.surN[0][7], [self.linxN[1][3], self.linxN[1][4], self.linxN[1][5], self.wake.linN[0][self.wing.n], self.wake.linN[0][self.wing.n+1], self.wake.linN[0][self.wing.n+2], self.wake.linN[0][self.wing.n+3], self.wake.linN[0][self.wing.n+4]])
         # top and bottom
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d}}};\n'.format(self.surN[0][8], self.linxN[0][1], self.linyN[0][1], -self.linxN[1][1], -self.linyN[0][0]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d}}};\n'.format(self.surN[0][9], self.linxN[0][4], self.linyN[0][3], -self.linxN[1][4], -self.linyN[0][2]))
-        # surfaces
+        file.loop(self.surN[0][8], [self.linxN[0][1], self.linyN[0][1], -self.linxN[1][1], -self.linyN[0][0]])
+        file.loop(self.surN[0][9], [self.linxN[0][4], self.linyN[0][3], -self.linxN[1][4], -self.linyN[0][2]])
+        self.writeRootLoops(file, self.loopN[0])
+        # surfaces (the additional bodies making holes in the symmetry planes)
         for i in range(0, self.surN[0].shape[0]):
-            file.write('Plane Surface({0:d}) = {{{0:d}}};\n'.format(self.surN[0][i]))
+            file.planeSurface(self.surN[0][i], [self.surN[0][i]] + [self.loopN[0][k] for k in range(0, len(self.bodies)) if i < 2 and self.side[k] == i])
         file.write('\n')
-        file.close()
 
-    def writeVolumes(self, fname):
+    def writeVolumes(self, file):
         """Write computational volume
         """
-        file = open(fname, 'a')
         file.write('// --- Computational volumes ---\n')
         file.write('// -- Upper\n')
         # surface loops
-        file.write('Surface Loop({0:d}) = {{'.format(1))
-        for i in range(0, self.wing.n-1):
-            for j in range(0, 3):
-                file.write('{0:d},'.format(self.wing.surN[i][j]))
-        for j in range(0, 3):
-            file.write('{0:d},'.format(self.tip.surN[0][j]))
-        for j in range(0, self.wake.surN[0].shape[0]):
-            file.write('{0:d},'.format(self.wake.surN[0][j]))
-        for j in range(0, 4):
-            file.write('{0:d},'.format(self.surN[0][2*j]))
-        file.write('{0:d}}};\n'.format(self.surN[0][8]))
+        sids = [self.wing.surN[i][j] for i in range(0, self.wing.n-1) for j in range(0, 3)] + list(self.tip.surN[0][0:3]) + list(self.wake.surN[0]) + list(self.surN[0][0:8:2]) + [self.surN[0][8]]
+        for k in range(0, len(self.bodies)):
+            if self.side[k] == 0:
+                sids += self.bodySurfaces(self.bodies[k])
+        file.surfaceLoop(self.volN[0][0], sids)
         file.write('// -- Lower\n')
-        file.write('Surface Loop({0:d}) = {{'.format(2))
-        for i in range(0, self.wing.n-1):
-            for j in range(3, 6):
-                file.write('{0:d},'.format(self.wing.surN[i][j]))
-        for j in range(3, 6):
-            file.write('{0:d},'.format(self.tip.surN[0][j]))
-        for j in range(0, self.wake.surN[0].shape[0]):
-            file.write('{0:d},'.format(self.wake.surN[0][j]))
-        for j in range(0, 4):
-            file.write('{0:d},'.format(self.surN[0][2*j+1]))
-        file.write('{0:d}}};\n'.format(self.surN[0][9]))
+        sids = [self.wing.surN[i][j] for i in range(0, self.wing.n-1) for j in range(3, 6)] + list(self.tip.surN[0][3:6]) + list(self.wake.surN[0]) + list(self.surN[0][1:8:2]) + [self.surN[0][9]]
+        for k in range(0, len(self.bodies)):
+            if self.side[k] == 1:
+                sids += self.bodySurfaces(self.bodies[k])
+        file.surfaceLoop(self.volN[0][1], sids)
         # volumes
-        file.write('Volume({0:d}) = {{{0:d}}};\n'.format(1))
-        file.write('Volume({0:d}) = {{{0:d}}};\n'.format(2))
+        file.volume(self.volN[0][0], [self.volN[0][0]])
+        file.volume(self.volN[0][1], [self.volN[0][1]])
         file.write('\n')
-        file.close()
 
-    def writePhysical(self, fname):
+    def writePhysical(self, file):
         """Write box physical groups
         """
-        file = open(fname, 'a')
         file.write('// --- Box physical groups ---\n')
-        file.write('Physical Surface("symmetry") = {{{0:d}}};\n'.format(self.surN[0][0]))
-        file.write('Physical Surface("symmetry_") = {{{0:d}}};\n'.format(self.surN[0][1]))
-        file.write('Physical Surface("downstream") = {{{0:d}}};\n'.format(self.surN[0][2]))
-        file.write('Physical Surface("downstream_") = {{{0:d}}};\n'.format(self.surN[0][3]))
-        file.write('Physical Surface("farfield") = {{{0:d},{1:d},{2:d},{3:d},{4:d},{5:d}}};\n'.format(self.surN[0][4],self.surN[0][5],self.surN[0][6],self.surN[0][7],self.surN[0][8],self.surN[0][9]))
-        file.write('Physical Volume("field") = {{{0:d}}};\n'.format(1))
-        file.write('Physical Volume("field_") = {{{0:d}}};\n'.format(2))
+        file.physical('Surface', 'symmetry', [self.surN[0][0]])
+        file.physical('Surface', 'symmetry_', [self.surN[0][1]])
+        file.physical('Surface', 'downstream', [self.surN[0][2]])
+        file.physical('Surface', 'downstream_', [self.surN[0][3]])
+        file.physical('Surface', 'farfield', self.surN[0][4:10])
+        file.physical('Volume', 'field', [self.volN[0][0]])
+        file.physical('Volume', 'field_', [self.volN[0][1]])
+        file.write('\n')
+
+    def writeFields(self, file):
+        """Write box mesh size fields
+        """
+        cm = self.wing.S / self.wing.b
+        file.write('// --- Mesh size fields ---\n')
+        self.writeEdgeFields(file, self.fldN[0][0:4])
+        file.write('// -- Wake\n')
+        nS = int(np.ceil(max(np.max(self.wake.pts[0][:,0]) - self.wing.ptsX[0,0], self.wing.b) / (cm/10))) + 1 # sampling finer than the threshold distance
+        file.field(self.fldN[0][4], 'Distance', [('SurfacesList', self.wake.surN[0][0:self.wing.n-1]), ('Sampling', nS)])
+        file.field(self.fldN[0][5], 'Threshold', [('InField', self.fldN[0][4]), ('SizeMin', 'msNear'), ('SizeMax', 'msF'), ('DistMin', cm/10), ('DistMax', 2*cm)])
+        self.writeNearField(file, self.fldN[0][6:7])
+        file.write('// -- Background\n')
+        file.field(self.fldN[0][7], 'Min', [('FieldsList', self.fldN[0][[1, 3, 5, 6]])])
+        file.backgroundField(self.fldN[0][7])
         file.write('\n')
-        file.close()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Export the geometry as binary arrays (.npz) described by a JSON index,
+# to be loaded by downstream tools without parsing the .geo file
+# Adrien Crovato
+
+import numpy as np
+
+# version of the export format
+_version = 1
+
+def write(fname, wing, tip, wake, geom, jac=None, bodies=[]):
+    """Write the component data and the entity/physical group tables to fname.npz and fname.json
+    jac optionally gives the names of the planform parameters and the Jacobian of the points (see sensitivity.jacobian)
+    bodies optionally gives the additional bodies, as (wing, wingtip) pairs, whose arrays are prefixed by body<k>_
+    The arrays are stored uncompressed, and the index gives their offsets in the .npz so that they can be memory-mapped
+    """
+    import json, os
+    arrays = {}
+    # wing sections and wingtip mean line, of the main wing and of each additional body
+    sections(arrays, '', wing, tip)
+    for k in range(0, len(bodies)):
+        sections(arrays, 'body{0:d}_'.format(k), *bodies[k])
+    # wake
+    if hasattr(wake, 'pts'):
+        arrays['wake_pts'] = wake.pts[0]
+        arrays['wake_ptsN'] = wake.ptsN[0]
+    # entities
+    geom.close()
+    arrays['points_id'] = geom.ptsId
+    arrays['points_x'] = geom.ptsX
+    if jac is not None:
+        arrays['points_jac'] = jac[1] # derivatives of the coordinates of each point with respect to each parameter
+    for k, t in geom.tables.items():
+        arrays[k + '_id'] = t.id
+        arrays[k + '_kind'] = t.kind
+        arrays[k + '_ptr'] = t.ptr
+        arrays[k + '_conn'] = t.conn
+    # physical groups (group i spanning groups_ids[groups_ptr[i]:groups_ptr[i+1]])
+    groups = geom.groups()
+    arrays['groups_ids'] = np.array([i for ids in groups.values() for i in ids], dtype=np.int32)
+    arrays['groups_ptr'] = np.cumsum([0] + [len(ids) for ids in groups.values()])
+    # write arrays, then index
+    npz = fname + '.npz'
+    np.savez(npz, **arrays)
+    index = {'format': 'geoGen', 'version': _version, 'npz': os.path.basename(npz),
+             'kinds': {'lines': ['Line', 'Spline', 'Circle'], 'surfaces': ['Surface', 'Plane Surface']},
+             'groups': [{'kind': k, 'name': n} for k, n in groups.keys()],
+             'bodies': [{'name': bodies[k][0].name, 'prefix': 'body{0:d}_'.format(k)} for k in range(0, len(bodies))],
+             'params': [] if jac is None else jac[0],
+             'arrays': offsets(npz)}
+    file = open(fname + '.json', 'w')
+    json.dump(index, file, indent=1)
+    file.close()
+
+def sections(arrays, pfx, wing, tip):
+    """Add the arrays of the sections of a wing and of its wingtip mean line, their names being prefixed by pfx
+    """
+    # wing sections (stacked, section i spanning wing_ptr[i]:wing_ptr[i+1])
+    arrays[pfx + 'wing_pts'] = wing.ptsX
+    arrays[pfx + 'wing_ptsN'] = wing.ptsId
+    arrays[pfx + 'wing_ptr'] = wing.ptr
+    arrays[pfx + 'wing_spts'] = wing.sptsNl # TE, upper TE, upper LE, LE, lower LE and lower TE local indices
+    arrays[pfx + 'wing_spanPos'] = np.array(wing.spanPos)
+    arrays[pfx + 'wing_chord'] = np.array(wing.chord)
+    # wingtip mean line
+    arrays[pfx + 'tip_pts'] = tip.pts[0]
+    arrays[pfx + 'tip_ptsN'] = tip.ptsN[0]
+    arrays[pfx + 'tip_spts'] = tip.sptsN[0]
+
+def offsets(npz):
+    """Return the dtype, shape and data offset of each (uncompressed) array stored in a .npz file
+    """
+    import struct, zipfile
+    arrays = {}
+    zf = zipfile.ZipFile(npz)
+    raw = open(npz, 'rb')
+    try:
+        for info in zf.infolist():
+            # start of the member data, after its local header
+            raw.seek(info.header_offset)
+            n, m = struct.unpack('<26xHH', raw.read(30))
+            start = info.header_offset + 30 + n + m
+            # start of the array data, after the .npy header
+            member = zf.open(info)
+            if np.lib.format.read_magic(member) == (1, 0):
+                shape, order, dtype = np.lib.format.read_array_header_1_0(member)
+            else:
+                shape, order, dtype = np.lib.format.read_array_header_2_0(member)
+            arrays[info.filename[:-4]] = {'dtype': dtype.str, 'shape': list(shape), 'order': 'F' if order else 'C', 'offset': start + member.tell()}
+            member.close()
+    finally:
+        raw.close()
+        zf.close()
+    return arrays
+
+def load(fname, mmap=True):
+    """Return the JSON index and the arrays exported to fname.json and fname.npz
+    The arrays are memory-mapped (read-only) by default, and fully read otherwise
+    """
+    import json, os
+    file = open(fname + '.json', 'r')
+    index = json.load(file)
+    file.close()
+    if index.get('format') != 'geoGen' or index.get('version') != _version:
+        raise Exception('export: ' + fname + '.json is not a geoGen export (version ' + str(_version) + ')!\n')
+    npz = os.path.join(os.path.dirname(os.path.abspath(fname)), index['npz'])
+    if mmap:
+        arrays = {}
+        for k, a in index['arrays'].items():
+            if np.prod(a['shape']) == 0:
+                arrays[k] = np.zeros(a['shape'], dtype=a['dtype'])
+            else:
+                arrays[k] = np.memmap(npz, dtype=a['dtype'], mode='r', offset=a['offset'], shape=tuple(a['shape']), order=a['order'])
+    else:
+        data = np.load(npz)
+        arrays = {k: data[k] for k in data.files}
+        data.close()
+    return index, arrays
@@ -23,136 +23,433 @@ limitations under the License.
 # to be meshed with gmsh for Flow or SU2 CFD solvers
 # Adrien Crovato
 
+import airfoil as af
+import cache as c
 import wing as w
 import tip as t
 import wake as wk
 import domain as d
+import writer as wr
+import geometry as g
+import numbering as n
+import params
+import memo as m
+import os
 
-def main(_module, _output):
+# maximum size of the output cache (bytes)
+_outSize = 1024*1024*1024
+# hash of the generator source (components, driver, airfoil parser and parameter checks), computed once
+_version = None
+
+def main(_module, _output, backend='geo', export=False, shard=False, nProc=None, split=False, jacobian=False, strict=False):
     # Get config
     p = getConfig(_module)
+    export = export or jacobian
+
+    # Stream the .geo text to stdout, without workspace nor printout
+    if _output == '-':
+        import sys
+        if backend != 'geo' or export or shard or split:
+            raise Exception('geoGen: only the .geo text, as a single file, can be streamed to stdout!\n')
+        wing, tip, wake, dom = build(p)
+        for e in check(p, wing, tip, wake, dom, strict):
+            print('Warning:', e, file=sys.stderr)
+        try:
+            outFile = wr.GeoWriter(stream=sys.stdout)
+            write(outFile, os.path.basename(_module), wing, tip, wake, dom)
+            outFile.close()
+            sys.stdout.flush()
+        except BrokenPipeError:
+            sys.stdout = None # reader exited early, do not flush again on exit
+        return
+
+    # Serve a single .geo file generated by a previous run with the same inputs
+    fname = os.path.join(createWdir(), _output)
+    odir = c.cacheDir('outputs')
+    store = None if odir is None or backend != 'geo' or export or shard or split else c.Store(odir, _outSize)
+    if store is not None:
+        key = outputKey(p, _module)
+        if store.place(key, '.geo', fname):
+            printInfo(fname, cached=True)
+            print('')
+            return
 
-    # Create wing, wingtip, wake and bounding domain
-    wing = w.Wing(p['airfName'], p['span'], p['taper'], p['sweep'], p['dihedral'], p['twist'], p['rootChord'], p['offset'])
+    # Create wing, wingtip, wake and bounding domain, reusing the components cached by previous runs
+    cdir = c.cacheDir('components')
+    memo = m.Pass() if cdir is None else m.Memo(cdir)
+    wing, tip, wake, dom = build(p, None, memo, split)
+
+    # Validate the components, aborting before writing anything if strict
+    errs = check(p, wing, tip, wake, dom, strict)
+
+    # Assemble the geometry, then write it in workspace, as .geo text or through the gmsh API
+    geom = assemble(_module, wing, tip, wake, dom, memo)
+    if shard and split:
+        raise Exception('geoGen: the .geo text can either be sharded or split into topology and coordinates!\n')
+    if shard:
+        import shard as s
+        if backend != 'geo':
+            raise Exception('geoGen: only the .geo text can be sharded!\n')
+        s.write(fname, geom, nProc)
+    elif split:
+        import topology as tp
+        if backend != 'geo':
+            raise Exception('geoGen: only the .geo text can be split into topology and coordinates!\n')
+        tp.write(fname, geom)
+    else:
+        if backend == 'gmsh':
+            outFile = wr.GmshWriter(fname, os.path.basename(_module))
+        else:
+            outFile = wr.GeoWriter(fname)
+        geom.emit(outFile)
+        outFile.close()
+    memo.save()
+    if store is not None and not errs:
+        storeOutput(store, key, fname)
+    if export:
+        import export as ex
+        jac = None
+        if jacobian:
+            import sensitivity as se
+            jac = se.jacobian(p, wing, tip, wake, dom, geom)
+        ex.write(os.path.splitext(fname)[0], wing, tip, wake, geom, jac, dom.bodies)
+
+    # Printout
+    printInfo(fname, memo, wing, warnings=errs)
+
+    # eof
+    print('')
+
+def generate(p, airfoils=None, stream=None, name='geoGen', memo=None):
+    """Generate the geometry from a parameter dictionary, without any side effect on the process
+    airfoils optionally gives the airfoil coordinates, either as a list (one array per station)
+    or as a dictionary mapping the names in p['airfName'] (and in those of the bodies) to arrays; the airfoil files are read otherwise
+    The geometry is written to stream (text or binary) if given, through a buffer of bounded size, and returned as a string otherwise
+    memo optionally gives a component cache (memo.Memo) shared by successive calls
+    """
+    if stream is None:
+        return ''.join(sections(p, airfoils, name, memo))
+    if airfoils is None:
+        airfoils = readAirfoils(airfNames(p), af.Loader())
+    wing, tip, wake, dom = build(p, airfoils, memo)
+    outFile = wr.GeoWriter(stream=stream)
+    write(outFile, name, wing, tip, wake, dom, memo)
+    outFile.close()
+
+def sections(p, airfoils=None, name='geoGen', memo=None):
+    """Generate the geometry from a parameter dictionary, yielding the .geo text section by section
+    Only the text of the current section of one component is held in memory
+    """
+    if airfoils is None:
+        airfoils = readAirfoils(airfNames(p), af.Loader())
+    wing, tip, wake, dom = build(p, airfoils, memo)
+    outFile = wr.GeoWriter()
+    for section in walk(outFile, name, wing, tip, wake, dom, memo):
+        yield outFile.getvalue()
+        outFile.buf = []
+
+def build(p, data=None, memo=None, untwisted=False):
+    """Create wing, wingtip, wake and bounding domain, sharing the entity numbering
+    The additional bodies (wing and wingtip) are numbered in their own namespace, and are held by the domain
+    data optionally gives the airfoil coordinates, as a list (one array per station of the main wing)
+    or as a dictionary mapping airfoil file names to arrays
+    memo optionally gives a component cache, so that only the components whose inputs changed are rebuilt
+    untwisted finds the separation points of the airfoils before twist, so that twist edits keep the topology (split mode)
+    """
+    params.check(p)
+    if data is None:
+        data = readAirfoils(airfNames(p))
+    if isinstance(data, dict):
+        bData = data
+        data = [data[f] for f in p['airfName']]
+    else:
+        bData = readAirfoils(airfNames(p)[len(p['airfName']):])
+    num = n.Numbering()
+    if memo is None:
+        memo = m.Pass()
+    # wing depends on airfoils and planform (and on the simplification tolerance, keeping the points used for the wake slope)
+    tol = p.get('airfTol')
+    nTe = p['nSlope'] if tol is not None and p['domType'] == 'box' else 0
+    key = memo.key('wing', num.next, data, [p[k] for k in ['span', 'taper', 'sweep', 'dihedral', 'twist', 'rootChord', 'offset']], tol, nTe, untwisted)
+    wing = memo.get('wing', key, lambda: w.Wing(data, p['span'], p['taper'], p['sweep'], p['dihedral'], p['twist'], p['rootChord'], p['offset'], num, tol, nTe, untwisted=untwisted), num, {})
+    # wingtip depends on wing
+    key = memo.key('tip', num.next, p['coWingtip'], memo.keyOf(wing))
     if p['coWingtip']:
-        tip = t.CTip(wing)
+        tip = memo.get('tip', key, lambda: t.CTip(wing, num), num, {'wing': wing})
     else:
-        tip = t.RTip(wing)
+        tip = memo.get('tip', key, lambda: t.RTip(wing, num), num, {'wing': wing})
+    # additional bodies (without wake), each one only depending on its own airfoils and planform since numbered in its own namespace
+    bodies = []
+    bKeys = []
+    for k in range(0, len(p.get('bodies', []))):
+        b = p['bodies'][k]
+        bNum = n.Numbering(k+1)
+        bAirf = [bData[f] for f in b['airfName']]
+        key = memo.key('wing', bNum.next, bAirf, [b[x] for x in ['span', 'taper', 'sweep', 'dihedral', 'twist', 'rootChord', 'offset']], tol, b['name'], untwisted)
+        bWing = memo.get('wing', key, lambda: w.Wing(bAirf, b['span'], b['taper'], b['sweep'], b['dihedral'], b['twist'], b['rootChord'], b['offset'], bNum, tol, 0, b['name'], untwisted), bNum, {})
+        key = memo.key('tip', bNum.next, True, memo.keyOf(bWing))
+        bTip = memo.get('tip', key, lambda: t.CTip(bWing, bNum), bNum, {'wing': bWing})
+        bNum.check()
+        bodies.append((bWing, bTip))
+        bKeys += [memo.keyOf(bWing), memo.keyOf(bTip)]
+    # wake depends on wing, wingtip and box; domain depends on its extents, on its size fields and on the components it encloses
+    fields = p.get('sizeFields', False)
     if p['domType'] == 'box':
-        wake = wk.Wake(p['xoBox'], p['xfBox'], p['yfBox'], p['nSlope'], wing, tip)
-        dom = d.Box(p['xoBox'], p['xfBox'], p['yfBox'], p['zoBox'], p['zfBox'], wing, tip, wake)
+        import validate as v
+        v.report(v.slopes(wing, p['nSlope'])) # the wake cannot be built otherwise
+        key = memo.key('wake', num.next, [p[k] for k in ['xoBox', 'xfBox', 'yfBox', 'nSlope']], memo.keyOf(wing), memo.keyOf(tip))
+        wake = memo.get('wake', key, lambda: wk.Wake(p['xoBox'], p['xfBox'], p['yfBox'], p['nSlope'], wing, tip, num), num, {'wing': wing, 'tip': tip})
+        key = memo.key('box', num.next, [p[k] for k in ['xoBox', 'xfBox', 'yfBox', 'zoBox', 'zfBox']], fields, memo.keyOf(wing), memo.keyOf(tip), memo.keyOf(wake), bKeys)
+        dom = memo.get('domain', key, lambda: d.Box(p['xoBox'], p['xfBox'], p['yfBox'], p['zoBox'], p['zfBox'], wing, tip, wake, num, fields, bodies), num, {'wing': wing, 'tip': tip, 'wake': wake, 'bodies': bodies})
     elif p['domType'] == 'sphere':
         wake = wk.GWake()
-        dom = d.Sphere(p['rSphere'], wing, tip)
+        key = memo.key('sphere', num.next, p['rSphere'], fields, memo.keyOf(wing), memo.keyOf(tip), bKeys)
+        dom = memo.get('domain', key, lambda: d.Sphere(p['rSphere'], wing, tip, num, fields, bodies), num, {'wing': wing, 'tip': tip, 'bodies': bodies})
     else:
         raise Exception('"domType" parameter can be either "box" or "sphere", but', p['domType'], 'was given!\n')
+    num.check()
+    return wing, tip, wake, dom
+
+def check(p, wing, tip, wake, dom, strict=False):
+    """Return the errors found in the built components, raising them instead if strict
+    """
+    import validate as v
+    errs = v.errors(p, wing, tip, wake, dom)
+    if strict:
+        v.report(errs)
+    return errs
+
+def assemble(_module, wing, tip, wake, dom, memo=None):
+    """Return the geometry of all components, as an intermediate representation to be emitted through any writer
+    """
+    geom = g.Geometry()
+    write(geom, _module, wing, tip, wake, dom, memo)
+    geom.close()
+    return geom
+
+def write(outFile, _module, wing, tip, wake, dom, memo=None):
+    """Write the geometry of all components, reusing the geometry cached in memo if given
+    """
+    for section in walk(outFile, _module, wing, tip, wake, dom, memo):
+        pass
 
-    # Switch to workspace and write
-    createWdir()
-    outFile = _output
+def walk(outFile, _module, wing, tip, wake, dom, memo=None):
+    """Write the geometry of all components section by section, yielding the name of the section
+    (header, options, points, lines, surfaces, volumes, physical, fields or mesh options) after each component
+    """
+    if memo is None:
+        memo = m.Pass()
+    # bodies, the main wing first
+    bodies = [wing, tip] + [obj for b in dom.bodies for obj in b]
     # misc
     writeHeader(outFile, _module)
-    wing.writeInfo(outFile)
-    tip.writeInfo(outFile)
-    dom.writeInfo(outFile)
-    wing.writeOpts(outFile)
-    dom.writeOpts(outFile)
-    # points
-    wing.writePoints(outFile)
-    tip.writePoints(outFile)
-    wake.writePoints(outFile)
-    dom.writePoints(outFile)
-    # lines
-    wing.writeLines(outFile)
-    tip.writeLines(outFile)
-    wake.writeLines(outFile)
-    dom.writeLines(outFile)
-    # surfaces
-    wing.writeSurfaces(outFile)
-    tip.writeSurfaces(outFile)
-    wake.writeSurfaces(outFile)
-    dom.writeSurfaces(outFile)
+    for obj in bodies + [dom]:
+        memo.emit(obj, 'writeInfo', outFile)
+    yield 'header'
+    for obj in bodies[0::2] + [dom]:
+        memo.emit(obj, 'writeOpts', outFile)
+    yield 'options'
+    # points, lines and surfaces
+    for section in ['points', 'lines', 'surfaces']:
+        for obj in bodies + [wake, dom]:
+            memo.emit(obj, 'write' + section.capitalize(), outFile)
+            yield section
     # volumes
-    dom.writeVolumes(outFile)
+    memo.emit(dom, 'writeVolumes', outFile)
+    yield 'volumes'
     # physical
-    wing.writePhysical(outFile)
-    tip.writePhysical(outFile)
-    wake.writePhysical(outFile)
-    dom.writePhysical(outFile)
+    for obj in bodies + [wake, dom]:
+        memo.emit(obj, 'writePhysical', outFile)
+        yield 'physical'
+    # size fields
+    if dom.fields:
+        memo.emit(dom, 'writeFields', outFile)
+        yield 'fields'
     # mesh options
-    writeOpts(outFile, tip.surN)
+    writeOpts(outFile, bodies[1::2])
+    yield 'mesh options'
 
-    # Printout
-    printInfo(outFile)   
+def outputKey(p, _module, hashes=None):
+    """Return the hash of the .geo file generated from resolved parameters, given the name written in its header
+    The airfoils enter the hash by the content of their files, optionally given by hashes (mapping file names to their hash)
+    """
+    import inspect, ntpath, sys
+    import numpy as np
+    global _version
+    if _version is None:
+        _version = m.digest(m.codeHash(), *[inspect.getsource(mod) for mod in [sys.modules[__name__], af, params]])
+    if hashes is None:
+        hashes = airfHashes(airfNames(p))
+    def canonical(x):
+        if isinstance(x, dict):
+            return {k: [hashes[f] for f in x[k]] if k == 'airfName' else canonical(x[k]) for k in x if k != 'airfPath'}
+        elif isinstance(x, np.ndarray):
+            return canonical(x.tolist())
+        elif isinstance(x, (list, tuple)):
+            return [canonical(v) for v in x]
+        elif isinstance(x, (int, float, np.integer, np.floating)) and not isinstance(x, (bool, np.bool_)):
+            return float(x)
+        return x
+    return m.digest(_version, ntpath.basename(_module), canonical(p))
 
-    # eof
-    print('')
+def airfHashes(fnames):
+    """Return the hash of the content of each distinct airfoil file
+    """
+    import hashlib
+    hashes = {}
+    for f in set(fnames):
+        file = open(f, 'rb')
+        hashes[f] = hashlib.sha1(file.read()).hexdigest()
+        file.close()
+    return hashes
+
+def storeOutput(store, key, fname):
+    """Add a generated .geo file to the output cache
+    The entry is made read-only, since it is served as a hard link that must not be edited in place
+    """
+    import shutil
+    def save(file):
+        src = open(fname, 'rb')
+        shutil.copyfileobj(src, file)
+        src.close()
+    if store.store(key, '.geo', save):
+        try:
+            os.chmod(store.path(key, '.geo'), 0o444)
+        except OSError:
+            pass
+
+def airfNames(p):
+    """Return the airfoil file names of the main wing and of the additional bodies
+    """
+    return p['airfName'] + [f for b in p.get('bodies', []) for f in b['airfName']]
+
+def readAirfoils(fnames, loader=None):
+    """Read each distinct airfoil file once, through the persistent airfoil cache by default
+    """
+    if loader is None:
+        loader = af.Loader(c.cacheDir('airfoils'))
+    return {f: loader.load(f) for f in set(fnames)}
 
 def getConfig(_module):
-    # Get prarmeters from config file
-    import os, sys, ntpath
-    sys.path.append(os.path.abspath(os.path.dirname(_module))) # tmp append module directory to pythonpath
-    module = __import__(ntpath.basename(_module)) # import config as module
-    p = module.getParams()
-    # Fix path
-    for i in range(0, len(p['airfName'])):
-        p['airfName'][i] = os.path.join(os.path.abspath(os.path.dirname(_module)), p['airfPath'],p['airfName'][i])
+    """Return the parameters of a config file, either data-only (.json or .toml)
+    or a python module defining getParams() (given with or without its .py extension)
+    """
+    p = loadConfig(_module)
+    params.check(p)
+    fixPaths(p, os.path.dirname(_module))
     return p
 
+def loadConfig(_module):
+    """Return the raw parameters of a config file, without validating them nor resolving the airfoil paths
+    """
+    import importlib.util, ntpath
+    root, ext = os.path.splitext(_module)
+    if ext in ['.json', '.toml']:
+        return params.load(_module)
+    if ext == '.py':
+        _module = root
+    spec = importlib.util.spec_from_file_location(ntpath.basename(_module), _module + '.py') # load config as module, without registering it nor altering pythonpath
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.getParams()
+
+def fixPaths(p, dname):
+    """Make the airfoil file names absolute, their path (airfPath) being relative to directory dname
+    """
+    for b in [p] + p.get('bodies', []):
+        for i in range(0, len(b['airfName'])):
+            b['airfName'][i] = os.path.join(os.path.abspath(dname), b.get('airfPath', p.get('airfPath', '')), b['airfName'][i])
+
 def createWdir():
-    import os
+    """Create the workspace directory and return its path
+    """
     wdir = os.path.join(os.getcwd(), 'workspace')
     if not os.path.isdir(wdir):
         print("creating", wdir)
         os.makedirs(wdir)
-    os.chdir(wdir)
+    return wdir
 
-def writeHeader(fname, _module):
+def writeHeader(file, _module):
     import ntpath
-    file = open(fname, 'w')
     file.write('/******************************************/\n')
     file.write('/* Gmsh geometry for {0:>20s} */\n'.format(ntpath.basename(_module)))
     file.write('/* Generated by      {0:>20s} */\n'.format(ntpath.basename(__file__)))
     file.write('/* Adrien Crovato                         */\n')
     file.write('/* ULiege, 2018-2019                      */\n')
     file.write('/******************************************/\n\n')
-    file.close()
 
-def writeOpts(fname, tipSur):
+def writeOpts(file, tips):
     """Write misc options
     """
-    import os
-    file = open(fname, 'a')
     file.write('// --- Misc Meshing options ---\n')
-    file.write('Mesh.Algorithm = 5; // Delaunay\n')
-    file.write('MeshAlgorithm Surface {{{0:d},{1:d}}} = 1; // Mesh-adapt\n'.format(tipSur[0][2], tipSur[0][3]))
-    file.write('Mesh.Algorithm3D = 2; // New Delaunay\n')
-    file.write('Mesh.OptimizeNetgen = 1;\n')
-    file.write('Mesh.Smoothing = 10;\n')
-    file.write('Mesh.SmoothNormals = 1;\n')
+    file.option('Mesh.Algorithm', 5, 'Delaunay')
+    file.meshAlgorithm([s for tip in tips for s in tip.surN[0][2:4]], 1, 'Mesh-adapt')
+    file.option('Mesh.Algorithm3D', 2, 'New Delaunay')
+    file.option('Mesh.OptimizeNetgen', 1)
+    file.option('Mesh.Smoothing', 10)
+    file.option('Mesh.SmoothNormals', 1)
     file.write('\n')
-    file.close()
 
-def printInfo(fname):
+def printInfo(fname, memo=None, wing=None, cached=False, warnings=[]):
     """Print info
     """
-    import os
     print('*' * 79)
     print('* geoGen')
     print('* Adrien Crovato')
     print('* ULiege, 2018-2020')
     print('* Distributed under Apache license 2.0')
     print('*' * 79)
-    print(os.path.abspath(os.path.join(os.getcwd(), fname)), 'has been successfully written!')
+    print(os.path.abspath(fname), 'has been successfully written!')
+    if cached:
+        print('Served from the output cache, inputs unchanged since a previous run')
+    if wing is not None and wing.tol is not None:
+        nRead, nKept = wing.reduction()
+        print('Airfoils simplified: {0:d} of {1:d} points kept ({2:.1f}% reduction)'.format(nKept, nRead, 100*(1-nKept/nRead)))
+    if memo is not None and memo.stats:
+        print('Component cache (hits/misses):', memo.report())
+    for e in warnings:
+        print('Warning:', e)
     print('Visual file check in gmsh recommended before further use!')
     print('*' * 79)
 
 if __name__ == "__main__":
     # Arguments parser
-    import argparse
+    import argparse, sys
     parser = argparse.ArgumentParser()
-    parser.add_argument('file', help='input config .py file')
-    parser.add_argument('-o', dest='out', help='output .geo file', default='grid.geo')
+    parser.add_argument('file', nargs='?', help='input config file (.py, .json or .toml)')
+    parser.add_argument('-o', dest='out', help='output .geo file, - for stdout (gmsh backend: any format written by gmsh, .msh to mesh)', default='grid.geo')
+    parser.add_argument('--backend', choices=['geo', 'gmsh'], help='write .geo text, or build the model through the gmsh python API', default='geo')
+    parser.add_argument('--export', action='store_true', help='also export the geometry as binary arrays (.npz) and a JSON index next to the output')
+    parser.add_argument('--jacobian', action='store_true', help='also export the derivatives of the points with respect to the planform parameters (implies --export)')
+    parser.add_argument('--shard', action='store_true', help='write the .geo text as a master file including one file per component section, formatted in parallel')
+    parser.add_argument('--strict', action='store_true', help='abort before writing if the built geometry is invalid (otherwise only warn)')
+    parser.add_argument('--split', action='store_true', help='write the topology once to the output file, including a coordinates file (grid.coords.geo) rewritten alone on subsequent runs')
+    parser.add_argument('--sweep', help='sweep definition .json file (parameter ranges or list of cases)')
+    parser.add_argument('-j', dest='nProc', type=int, help='number of worker processes for sweeps and sharded output (default: all cores)')
+    parser.add_argument('--serve', nargs='?', const='', metavar='SOCKET', help='run a server answering the requests of client.py on a Unix socket (default: $GEOGEN_SOCKET, or a per-user socket), or JSON lines on stdin if -')
+    parser.add_argument('--profile', nargs='?', const='', metavar='JSON', help='print the time, memory, bytes written and entities of each stage (to stderr), and optionally dump them to a .json file')
     args = parser.parse_args()
 
-    main(args.file[:-3], args.out)
+    if args.serve is not None:
+        import server
+        server.main(args.serve if args.serve else None)
+        sys.exit(0)
+    if args.file is None:
+        parser.error('the config file is required')
+    if args.profile is not None:
+        import profiler
+        prof = profiler.Profiler()
+        prof.install(sys.modules[__name__])
+    cfg = args.file[:-3] if args.file.endswith('.py') else args.file
+    try:
+        if args.sweep:
+            import sweep
+            sweep.main(cfg, args.sweep, args.out, args.nProc, args.strict)
+        else:
+            main(cfg, args.out, args.backend, args.export, args.shard, args.nProc, args.split, args.jacobian, args.strict)
+    finally:
+        if args.profile is not None:
+            prof.uninstall()
+            print(prof.report(), file=sys.stderr)
+            if args.profile:
+                prof.dump(args.profile)
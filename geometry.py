@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Create an unstructured tetrahedral grid around a wing
+# to be meshed with gmsh for Flow or SU2 CFD solvers
+# Adrien Crovato
+
+import numpy as np
+import writer as wr
+
+# entity kinds
+LINE, SPLINE, CIRCLE = 0, 1, 2 # lines
+SURFACE, PLANE = 0, 1 # surfaces
+
+## Growable table of entities
+# Entity IDs and kinds, and their connectivity stored in compressed row format:
+# the connectivity of the ith entity is conn[ptr[i]:ptr[i+1]]. The entities are written straight
+# into the arrays, which have room for more (see grow), and are cut to size by trim
+#
+# Adrien Crovato
+class Table:
+    def __init__(self):
+        self.n = 0 # number of entities
+        self.id = np.zeros(0, dtype=np.int32) # entity IDs
+        self.kind = np.zeros(0, dtype=np.int8) # entity kinds
+        self.ptr = np.zeros(1, dtype=np.int64) # connectivity offsets
+        self.conn = np.zeros(0, dtype=np.int32) # connectivity (signed IDs of the lower dimension entities)
+
+    def __len__(self):
+        return self.n
+
+    def add(self, id, kind, conn):
+        """Add an entity
+        """
+        conn = np.asarray(conn, dtype=np.int32).ravel()
+        n, a = self.n, self.ptr[self.n]
+        self.id = grow(self.id, n+1)
+        self.kind = grow(self.kind, n+1)
+        self.ptr = grow(self.ptr, n+2)
+        self.conn = grow(self.conn, a+conn.shape[0])
+        self.id[n] = id
+        self.kind[n] = kind
+        self.ptr[n+1] = a + conn.shape[0]
+        self.conn[a:a+conn.shape[0]] = conn
+        self.n += 1
+
+    def extend(self, other, a=0, b=None):
+        """Append the entities a to b (excluded, all of them by default) of another table
+        """
+        b = other.n if b is None else b
+        n, m = self.n, self.ptr[self.n]
+        ptr = other.ptr[a:b+1] - other.ptr[a]
+        self.id = grow(self.id, n+b-a)
+        self.kind = grow(self.kind, n+b-a)
+        self.ptr = grow(self.ptr, n+b-a+1)
+        self.conn = grow(self.conn, m+ptr[-1])
+        self.id[n:n+b-a] = other.id[a:b]
+        self.kind[n:n+b-a] = other.kind[a:b]
+        self.ptr[n+1:n+b-a+1] = m + ptr[1:]
+        self.conn[m:m+ptr[-1]] = other.conn[other.ptr[a]:other.ptr[b]]
+        self.n += b-a
+
+    def trim(self):
+        """Cut the arrays to size
+        """
+        self.id = self.id[0:self.n]
+        self.kind = self.kind[0:self.n]
+        self.ptr = self.ptr[0:self.n+1]
+        self.conn = self.conn[0:self.ptr[-1]]
+
+    def rows(self, a, b):
+        """Return the IDs, kinds and connectivity of the entities a to b (excluded), as python objects
+        """
+        conn = self.conn[self.ptr[a]:self.ptr[b]].tolist()
+        ptr = (self.ptr[a:b+1] - self.ptr[a]).tolist()
+        return zip(self.id[a:b].tolist(), self.kind[a:b].tolist(), [conn[ptr[i]:ptr[i+1]] for i in range(0, b-a)])
+
+def grow(a, n):
+    """Return an array holding the rows of a, with room for at least n rows
+    The array is returned as is if it is large enough, and is copied into an array twice as large otherwise
+    """
+    if a.shape[0] >= n:
+        return a
+    b = np.zeros((max(n, 2*a.shape[0]),) + a.shape[1:], dtype=a.dtype)
+    b[0:a.shape[0]] = a
+    return b
+
+## Geometry intermediate representation
+# The components describe their entities through the writer interface, which writes them straight
+# into contiguous arrays (point coordinates, IDs and mesh sizes, and line, loop, surface, surface loop
+# and volume tables) while recording the order of the calls. Serializers (any writer) then read it
+# through emit, so that the topology is computed once for all backends
+#
+# Adrien Crovato
+class Geometry(wr.Writer):
+    def __init__(self):
+        wr.Writer.__init__(self)
+        # points
+        self.nPts = 0 # number of points
+        self.ptsX = np.zeros([0, 3]) # coordinates
+        self.ptsId = np.zeros(0, dtype=np.int32) # IDs
+        self.ptsSize = np.zeros(0, dtype=np.int32) # mesh size expressions, as indices in exprs
+        self.exprs = [''] # distinct mesh size expressions ('' for none)
+        # connectivity tables
+        self.tables = {'lines': Table(), 'loops': Table(), 'surfaces': Table(), 'sloops': Table(), 'volumes': Table()}
+        # ordered records, as [op, first, last] for entity ranges or [op, args...] for other calls
+        self.events = []
+        self.barrier = 0 # first record into which additions can be merged (see mark)
+
+    def record(self, op, a, b):
+        """Record the addition of the entities a to b (excluded) of a table, merging consecutive additions
+        """
+        if len(self.events) > self.barrier and self.events[-1][0] == op and self.events[-1][2] == a:
+            self.events[-1][2] = b
+        else:
+            self.events.append([op, a, b])
+
+    def mark(self):
+        """Return the current number of records, points and entities of each table, so that the records
+        added between two marks can be extracted as a fragment, and keep later additions from being merged into the records
+        """
+        self.barrier = len(self.events)
+        return (len(self.events), self.nPts, {k: len(t) for k, t in self.tables.items()})
+
+    def code(self, expr):
+        """Return the index of a mesh size expression
+        """
+        try:
+            return self.exprs.index(expr)
+        except ValueError:
+            self.exprs.append(expr)
+            return len(self.exprs) - 1
+
+    def write(self, txt):
+        """Record text (comments)
+        """
+        self.events.append(['write', txt])
+
+    def constant(self, name, val, label):
+        """Record a user-definable constant
+        """
+        self.events.append(['constant', name, val, label])
+
+    def points(self, ids, pts, sfx=''):
+        """Add points, with their mesh size expressions
+        """
+        ids = np.asarray(ids, dtype=np.int32).ravel()
+        if isinstance(sfx, str):
+            codes = np.full(ids.shape[0], self.code(sfx), dtype=np.int32)
+        else:
+            sfx = np.asarray(sfx, dtype=object)
+            codes = np.zeros(ids.shape[0], dtype=np.int32)
+            for expr in set(sfx.tolist()):
+                codes[sfx == expr] = self.code(expr)
+        n, k = self.nPts, ids.shape[0]
+        self.ptsId = grow(self.ptsId, n+k)
+        self.ptsX = grow(self.ptsX, n+k)
+        self.ptsSize = grow(self.ptsSize, n+k)
+        self.ptsId[n:n+k] = ids
+        self.ptsX[n:n+k, :] = np.asarray(pts, dtype=float).reshape(-1, 3)
+        self.ptsSize[n:n+k] = codes
+        self.nPts += k
+        self.record('points', n, n+k)
+
+    def spline(self, id, ids):
+        """Add a spline
+        """
+        self.add('lines', id, SPLINE, list(ids) if isinstance(ids, range) else ids)
+
+    def line(self, id, a, b):
+        """Add a straight line
+        """
+        self.add('lines', id, LINE, [a, b])
+
+    def circle(self, id, a, c, b):
+        """Add a circle arc
+        """
+        self.add('lines', id, CIRCLE, [a, c, b])
+
+    def loop(self, id, lines):
+        """Add a line loop
+        """
+        self.add('loops', id, 0, lines)
+
+    def surface(self, id, loops):
+        """Add a filling surface
+        """
+        self.add('surfaces', id, SURFACE, loops)
+
+    def planeSurface(self, id, loops):
+        """Add a plane surface
+        """
+        self.add('surfaces', id, PLANE, loops)
+
+    def surfaceLoop(self, id, surfs):
+        """Add a surface loop
+        """
+        self.add('sloops', id, 0, surfs)
+
+    def volume(self, id, sloops):
+        """Add a volume
+        """
+        self.add('volumes', id, 0, sloops)
+
+    def add(self, op, id, kind, conn):
+        """Add an entity to a table
+        """
+        t = self.tables[op]
+        t.add(id, kind, conn)
+        self.record(op, len(t)-1, len(t))
+
+    def physical(self, kind, name, ids, append=False):
+        """Record a physical group, or an addition to it
+        """
+        self.events.append(['physical', kind, name, np.asarray(ids).tolist(), append])
+
+    def option(self, name, val, comment=''):
+        """Record a gmsh option
+        """
+        self.events.append(['option', name, val, comment])
+
+    def meshAlgorithm(self, surfs, val, comment=''):
+        """Record the 2D meshing algorithm to be used on some surfaces
+        """
+        self.events.append(['meshAlgorithm', np.asarray(surfs).tolist(), val, comment])
+
+    def field(self, id, kind, opts):
+        """Record a mesh size field
+        """
+        self.events.append(['field', int(id), kind, [(name, np.asarray(val).tolist() if isinstance(val, (list, tuple, np.ndarray)) else val) for name, val in opts]])
+
+    def backgroundField(self, id):
+        """Record the field used as background mesh size
+        """
+        self.events.append(['backgroundField', int(id)])
+
+    def close(self):
+        """Cut the arrays to size
+        """
+        self.ptsId = self.ptsId[0:self.nPts]
+        self.ptsX = self.ptsX[0:self.nPts, :]
+        self.ptsSize = self.ptsSize[0:self.nPts]
+        for t in self.tables.values():
+            t.trim()
+
+    def extend(self, other, start=None, end=None):
+        """Append the entities and records of another geometry, or those added between two of its marks
+        """
+        e0, p0, t0 = (0, 0, {k: 0 for k in other.tables}) if start is None else start
+        e1, p1, t1 = (len(other.events), other.nPts, {k: len(t) for k, t in other.tables.items()}) if end is None else end
+        offset = {'points': self.nPts - p0}
+        for k in self.tables:
+            offset[k] = len(self.tables[k]) - t0[k]
+            self.tables[k].extend(other.tables[k], t0[k], t1[k])
+        codes = np.array([self.code(e) for e in other.exprs], dtype=np.int32)
+        n = self.nPts
+        self.ptsId = grow(self.ptsId, n+p1-p0)
+        self.ptsX = grow(self.ptsX, n+p1-p0)
+        self.ptsSize = grow(self.ptsSize, n+p1-p0)
+        self.ptsId[n:n+p1-p0] = other.ptsId[p0:p1]
+        self.ptsX[n:n+p1-p0, :] = other.ptsX[p0:p1, :]
+        self.ptsSize[n:n+p1-p0] = codes[other.ptsSize[p0:p1]]
+        self.nPts += p1-p0
+        for e in other.events[e0:e1]:
+            if e[0] in offset:
+                self.record(e[0], e[1] + offset[e[0]], e[2] + offset[e[0]])
+            else:
+                self.events.append(list(e))
+
+    def fragment(self, start, end):
+        """Return the entities and records added between two marks, as a new geometry
+        """
+        e0, p0, t0 = start
+        e1, p1, t1 = end
+        frag = Geometry()
+        frag.exprs = list(self.exprs)
+        frag.nPts = p1-p0
+        frag.ptsId = self.ptsId[p0:p1].copy()
+        frag.ptsX = self.ptsX[p0:p1, :].copy()
+        frag.ptsSize = self.ptsSize[p0:p1].copy()
+        offset = dict({'points': p0}, **t0)
+        for k in frag.tables:
+            frag.tables[k].extend(self.tables[k], t0[k], t1[k])
+        frag.events = [[e[0], e[1] - offset[e[0]], e[2] - offset[e[0]]] if e[0] in offset else list(e) for e in self.events[e0:e1]]
+        frag.close()
+        return frag
+
+    def groups(self):
+        """Return the IDs of the entities in each physical group, indexed by (kind, name)
+        """
+        groups = {}
+        for e in self.events:
+            if e[0] == 'physical':
+                if not e[4]:
+                    groups[(e[1], e[2])] = []
+                groups[(e[1], e[2])] += e[3]
+        return groups
+
+    def emit(self, writer, events=None):
+        """Replay the records (all of them, or a subset) through a writer
+        """
+        self.close()
+        exprs = np.array(self.exprs, dtype=object)
+        for e in (self.events if events is None else events):
+            op = e[0]
+            if op == 'points':
+                writer.points(self.ptsId[e[1]:e[2]], self.ptsX[e[1]:e[2], :], exprs[self.ptsSize[e[1]:e[2]]])
+            elif op == 'lines':
+                for id, kind, c in self.tables[op].rows(e[1], e[2]):
+                    if kind == SPLINE:
+                        writer.spline(id, c)
+                    elif kind == LINE:
+                        writer.line(id, c[0], c[1])
+                    else:
+                        writer.circle(id, c[0], c[1], c[2])
+            elif op == 'surfaces':
+                for id, kind, c in self.tables[op].rows(e[1], e[2]):
+                    if kind == PLANE:
+                        writer.planeSurface(id, c)
+                    else:
+                        writer.surface(id, c)
+            elif op in self.tables:
+                add = {'loops': writer.loop, 'sloops': writer.surfaceLoop, 'volumes': writer.volume}[op]
+                for id, kind, c in self.tables[op].rows(e[1], e[2]):
+                    add(id, c)
+            else:
+                getattr(writer, op)(*e[1:])
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Create an unstructured tetrahedral grid around a wing
+# to be meshed with gmsh for Flow or SU2 CFD solvers
+# Adrien Crovato
+
+import cache as c
+
+# modules whose source defines the generated geometry
+_sources = ['wing', 'tip', 'wake', 'domain', 'numbering', 'writer', 'geometry', 'memo']
+# attributes referencing other components, relinked instead of being cached
+_links = ['wing', 'tip', 'wake', 'bodies', 'num']
+# classes whose objects can be cached (components and their emitted geometry), as (module, class)
+_classes = [('wing', 'Wing'), ('tip', 'CTip'), ('wake', 'Wake'), ('domain', 'Sphere'), ('domain', 'Box'), ('geometry', 'Geometry'), ('geometry', 'Table')]
+# hash of the generator source, computed once
+_code = None
+
+def digest(*items):
+    """Return the hash of a sequence of parameters and arrays
+    """
+    import hashlib
+    import numpy as np
+    h = hashlib.sha1()
+    def feed(item):
+        if isinstance(item, np.ndarray):
+            h.update('a{0:s}{1:s}'.format(item.dtype.str, str(item.shape)).encode())
+            h.update(np.ascontiguousarray(item).tobytes())
+        elif isinstance(item, (list, tuple)):
+            h.update('l{0:d}'.format(len(item)).encode())
+            for i in item:
+                feed(i)
+        elif isinstance(item, dict):
+            h.update('d{0:d}'.format(len(item)).encode())
+            for k in sorted(item):
+                feed(k)
+                feed(item[k])
+        else:
+            h.update('{0:s}{1:s};'.format(type(item).__name__, repr(item)).encode())
+    for item in items:
+        feed(item)
+    return h.hexdigest()
+
+def codeHash():
+    """Return the hash of the source of the modules generating the geometry
+    """
+    import importlib, inspect
+    global _code
+    if _code is None:
+        _code = digest(*[inspect.getsource(importlib.import_module(m)) for m in _sources])
+    return _code
+
+## Generic component cache, caching nothing
+#
+# Adrien Crovato
+class Pass:
+    def __init__(self):
+        self.stats = {}
+
+    def key(self, *items):
+        return None
+
+    def keyOf(self, obj):
+        return None
+
+    def get(self, name, key, make, num, links):
+        return make()
+
+    def emit(self, obj, method, outFile):
+        getattr(obj, method)(outFile)
+
+    def save(self):
+        pass
+
+    def trim(self, n):
+        pass
+
+    def report(self):
+        return ''
+
+## Memoize the components and their emitted geometry
+# Each component is stored under the hash of exactly the inputs it depends on (its parameters,
+# the keys of the components it references and the state of the entity numbering), so that only
+# the components whose inputs changed are rebuilt and re-emitted
+#
+# Adrien Crovato
+class Memo(Pass):
+    def __init__(self, cdir=None, maxSize=256*1024*1024):
+        self.store = None if cdir is None else c.Store(cdir, maxSize) # persistent cache (none if cdir is None)
+        self.code = codeHash() # hash of the generator source
+        self.entries = {} # cached components keyed by hash
+        self.keys = {} # hash of each component in use, keyed by object id
+        self.dirty = set() # hashes of the entries to be saved
+        self.stats = {}
+
+    def key(self, *items):
+        """Return the hash of a component, given its inputs
+        """
+        return digest(self.code, *items)
+
+    def keyOf(self, obj):
+        """Return the hash of a component in use
+        """
+        return self.keys[id(obj)]
+
+    def get(self, name, key, make, num, links):
+        """Return a component from the cache, or create it with make() and cache it
+        links maps the attributes referencing other components (and numbering) to their current objects
+        """
+        stats = self.stats.setdefault(name, {'hit': 0, 'miss': 0})
+        e = self.fetch(key)
+        if e is None:
+            stats['miss'] += 1
+            obj = make()
+            e = {'obj': obj, 'next': dict(num.next), 'geom': {}}
+            self.entries[key] = e
+            self.dirty.add(key)
+        else:
+            stats['hit'] += 1
+            obj = e['obj']
+            num.next = dict(e['next'])
+            for k in links:
+                setattr(obj, k, links[k])
+            obj.num = num
+        self.keys[id(obj)] = key
+        return obj
+
+    def emit(self, obj, method, outFile):
+        """Emit a section of a component, reusing its cached geometry when emitting to a geometry
+        The geometry of the section is kept as a reference to the records it added to outFile, instead of a copy,
+        and is only extracted when the entry is saved or outlives the generation (see trim)
+        """
+        import geometry as g
+        key = self.keys.get(id(obj))
+        if key is None or not isinstance(outFile, g.Geometry):
+            getattr(obj, method)(outFile)
+            return
+        frags = self.entries[key]['geom']
+        start = outFile.mark()
+        if method not in frags:
+            getattr(obj, method)(outFile)
+            self.dirty.add(key)
+        else:
+            outFile.extend(*fragment(frags[method]))
+        frags[method] = (outFile, start, outFile.mark())
+
+    def fetch(self, key):
+        """Return a cache entry from memory or from the cache directory, None if not cached
+        """
+        if key in self.entries:
+            self.entries[key] = self.entries.pop(key) # most recently used last
+            return self.entries[key]
+        if self.store is None:
+            return None
+        path = self.store.fetch(key, '.npz')
+        if path is None:
+            return None
+        try:
+            obj, nxt, geom = load(path)
+        except Exception:
+            return None
+        self.entries[key] = {'obj': obj, 'next': nxt, 'geom': geom}
+        return self.entries[key]
+
+    def save(self):
+        """Write the new or updated entries to the cache directory
+        """
+        if self.store is not None:
+            for key in self.dirty:
+                e = self.entries[key]
+                item = [e['obj'], e['next'], {k: extract(f) for k, f in e['geom'].items()}]
+                self.store.store(key, '.npz', lambda f: dump(f, item))
+        self.dirty.clear()
+
+    def trim(self, n):
+        """Save the new entries, then drop the least recently used entries held in memory beyond n,
+        and extract the geometry of the others from the geometry they were emitted to
+        Must be called between generations, since the components in use are forgotten
+        """
+        self.save()
+        for key in list(self.entries)[0:max(0, len(self.entries)-n)]:
+            del self.entries[key]
+        for e in self.entries.values():
+            e['geom'] = {k: extract(f) for k, f in e['geom'].items()}
+        self.keys = {}
+
+    def report(self):
+        """Return the hit/miss statistics as a string
+        """
+        return ', '.join(['{0:s} {1:d}/{2:d}'.format(k, v['hit'], v['miss']) for k, v in self.stats.items()])
+
+def fragment(frag):
+    """Return the geometry holding a cached section and the marks delimiting it, as arguments of geometry.Geometry.extend
+    """
+    return frag if isinstance(frag, tuple) else (frag, None, None)
+
+def extract(frag):
+    """Return the geometry of a cached section, as a geometry of its own
+    """
+    return frag[0].fragment(frag[1], frag[2]) if isinstance(frag, tuple) else frag
+
+def dump(file, item):
+    """Write an item to a binary file in a data-only format: an npz archive holding its arrays,
+    and its structure as JSON (doc), so that loading it never runs code (unlike pickle)
+    """
+    import json
+    import numpy as np
+    arrays = {}
+    doc = encode(item, arrays)
+    arrays['doc'] = np.frombuffer(json.dumps(doc).encode(), dtype=np.uint8)
+    np.savez(file, **arrays)
+
+def load(fname):
+    """Return the item written to a file by dump
+    """
+    import json
+    import numpy as np
+    data = np.load(fname, allow_pickle=False)
+    try:
+        return decode(json.loads(data['doc'].tobytes().decode()), data)
+    finally:
+        data.close()
+
+def encode(item, arrays):
+    """Return the JSON description of an item, its arrays being added to arrays
+    Only arrays of numbers, numpy and python scalars, strings, lists, tuples, dictionaries with string keys
+    and objects of the cached classes (without their links to other components) are supported
+    """
+    import numpy as np
+    if isinstance(item, np.ndarray):
+        if item.dtype.hasobject:
+            raise TypeError('memo: cannot cache arrays of objects!')
+        k = 'a{0:d}'.format(len(arrays))
+        arrays[k] = item
+        return {'a': k}
+    elif isinstance(item, np.generic):
+        return {'s': item.dtype.str, 'v': item.item()}
+    elif item is None or isinstance(item, (bool, int, float, str)):
+        return item
+    elif isinstance(item, list):
+        return [encode(i, arrays) for i in item]
+    elif isinstance(item, tuple):
+        return {'t': [encode(i, arrays) for i in item]}
+    elif isinstance(item, dict):
+        if not all([isinstance(k, str) for k in item]):
+            raise TypeError('memo: cannot cache dictionaries with non-string keys!')
+        return {'d': {k: encode(v, arrays) for k, v in item.items()}}
+    elif (type(item).__module__, type(item).__name__) in _classes:
+        return {'o': [type(item).__module__, type(item).__name__], 'v': encode({k: v for k, v in item.__dict__.items() if k not in _links}, arrays)}
+    raise TypeError('memo: cannot cache objects of type ' + type(item).__name__ + '!')
+
+def decode(doc, data):
+    """Return the item described by the JSON description doc, its arrays being read from data
+    """
+    import importlib
+    import numpy as np
+    if isinstance(doc, list):
+        return [decode(i, data) for i in doc]
+    elif not isinstance(doc, dict):
+        return doc
+    elif 'a' in doc:
+        return data[doc['a']]
+    elif 's' in doc:
+        return np.dtype(doc['s']).type(doc['v'])
+    elif 't' in doc:
+        return tuple([decode(i, data) for i in doc['t']])
+    elif 'd' in doc:
+        return {k: decode(v, data) for k, v in doc['d'].items()}
+    if tuple(doc['o']) not in _classes:
+        raise TypeError('memo: objects of type ' + doc['o'][1] + ' are not cached!')
+    cls = getattr(importlib.import_module(doc['o'][0]), doc['o'][1])
+    obj = cls.__new__(cls)
+    obj.__dict__.update(decode(doc['v'], data))
+    return obj
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Create an unstructured tetrahedral grid around a wing
+# to be meshed with gmsh for Flow or SU2 CFD solvers
+# Adrien Crovato
+
+import numpy as np
+
+## Allocate contiguous entity IDs shared by all components
+#
+# Adrien Crovato
+class Numbering:
+    stride = 10000000 # number of IDs of each entity type reserved for each namespace
+
+    def __init__(self, k=0):
+        # namespace index (IDs of namespace k starting at k*stride+1, so that the IDs of a body numbered
+        # in its own namespace do not depend on the other bodies), and next free ID for each entity type
+        self.k = k
+        self.next = {'point': 1, 'line': 1, 'loop': 1, 'surface': 1, 'volume': 1, 'field': 1}
+        for t in self.next:
+            self.next[t] += k*self.stride
+
+    def draw(self, kind, n):
+        """Return n contiguous IDs of a given entity type
+        """
+        ids = np.arange(self.next[kind], self.next[kind]+n)
+        self.next[kind] += n
+        return ids
+
+    def points(self, n):
+        """Return n point IDs
+        """
+        return self.draw('point', n)
+
+    def lines(self, n):
+        """Return n line IDs
+        """
+        return self.draw('line', n)
+
+    def loops(self, n):
+        """Return n line loop IDs, for loops which do not define a surface on their own
+        """
+        return self.draw('loop', n)
+
+    def surfaces(self, n):
+        """Return n surface IDs, their defining line loops sharing the same IDs
+        """
+        start = max(self.next['surface'], self.next['loop'])
+        self.next['surface'] = self.next['loop'] = start
+        self.draw('loop', n)
+        return self.draw('surface', n)
+
+    def volumes(self, n):
+        """Return n volume IDs, their defining surface loops sharing the same IDs
+        """
+        return self.draw('volume', n)
+
+    def fields(self, n):
+        """Return n mesh size field IDs
+        """
+        return self.draw('field', n)
+
+    def check(self):
+        """Raise an exception if the IDs overflowed the namespace
+        """
+        for t in self.next:
+            if self.next[t] > (self.k+1)*self.stride:
+                raise Exception('Numbering: too many {0:s}s in namespace {1:d}!\n'.format(t, self.k))
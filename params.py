@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Read data-only (.json, .toml) config files, and validate parameters
+# before any geometry is built
+# Adrien Crovato
+
+import numpy as np
+
+# numeric array parameters: size (in number of planforms nP, or fixed) and open bounds of their values
+_arrays = {
+    'span': ('nP', 0., None),
+    'taper': ('nP', 0., None),
+    'sweep': ('nP', -90., 90.),
+    'dihedral': ('nP', -90., 90.),
+    'twist': ('nP+1', -90., 90.),
+    'offset': (2, None, None)
+}
+# numeric scalar parameters: open bounds of their values, and whether they are required for both domain types
+_scalars = {
+    'rootChord': (0., None, True),
+    'airfTol': (0., None, False),
+    'rSphere': (0., None, False),
+    'xoBox': (None, None, False),
+    'xfBox': (None, None, False),
+    'yfBox': (0., None, False),
+    'zoBox': (None, None, False),
+    'zfBox': (None, None, False),
+}
+# other parameters (airfoils, wingtip, domain type, wake, size fields and additional bodies)
+_others = ['airfPath', 'airfName', 'coWingtip', 'domType', 'nSlope', 'sizeFields', 'bodies']
+# parameters of the additional bodies
+_body = ['name', 'airfPath', 'airfName', 'span', 'taper', 'sweep', 'dihedral', 'twist', 'rootChord', 'offset']
+# parameters required by each domain type
+_domains = {
+    'box': ['xoBox', 'xfBox', 'yfBox', 'zoBox', 'zfBox', 'nSlope'],
+    'sphere': ['rSphere']
+}
+
+def names():
+    """Return the names of all the parameters, required or optional
+    """
+    return list(_arrays) + list(_scalars) + _others
+
+def load(fname):
+    """Return the parameters stored in a data-only config file (.json or .toml)
+    """
+    import os
+    ext = os.path.splitext(fname)[1]
+    if ext == '.json':
+        import json
+        file = open(fname, 'r')
+        p = json.load(file)
+        file.close()
+    elif ext == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise Exception('params: python 3.11 or the tomli module is required to read .toml configs!\n')
+        file = open(fname, 'rb')
+        p = tomllib.load(file)
+        file.close()
+    else:
+        raise Exception('params: config file', fname, 'should be a .json or .toml file!\n')
+    if not isinstance(p, dict):
+        raise Exception('params: config file', fname, 'should define a table of parameters!\n')
+    return p
+
+def planform(b, errs, pfx=''):
+    """Check the airfoils and the planform arrays of a body, appending the errors to errs
+    Return the arrays, or None if the airfoils are not given
+    """
+    if not isinstance(b.get('airfName'), list) or len(b['airfName']) < 2 or not all([isinstance(f, str) for f in b['airfName']]):
+        errs.append('"{0:s}airfName" should be a list of at least 2 airfoil file names'.format(pfx))
+        return None
+    nP = len(b['airfName']) - 1
+    a = {}
+    for k, (size, lo, hi) in _arrays.items():
+        n = nP if size == 'nP' else nP + 1 if size == 'nP+1' else size
+        try:
+            a[k] = np.asarray(b[k], dtype=float)
+        except KeyError:
+            errs.append('"{0:s}" is missing'.format(pfx + k))
+            continue
+        except (TypeError, ValueError):
+            errs.append('"{0:s}" should be a list of numbers'.format(pfx + k))
+            continue
+        if a[k].shape != (n,):
+            errs.append('"{0:s}" should be of size {1:d} ({2:s}), but is of size {3:s}'.format(pfx + k, n, str(size), str(a[k].shape[0] if a[k].ndim == 1 else a[k].shape)))
+            del a[k]
+            continue
+        bad = ~np.isfinite(a[k])
+        if lo is not None:
+            bad |= ~(a[k] > lo)
+        if hi is not None:
+            bad |= ~(a[k] < hi)
+        if bad.any():
+            errs.append('"{0:s}" should be within ({1:s}, {2:s}), but has invalid values at {3:s}'.format(pfx + k, str(lo), str(hi), str(np.flatnonzero(bad).tolist())))
+    return a
+
+def scalar(b, k, lo, hi, errs, pfx=''):
+    """Check a numeric scalar parameter, appending the errors to errs, and return its value (None if invalid)
+    """
+    if isinstance(b[k], bool) or not isinstance(b[k], (int, float, np.integer, np.floating)) or not np.isfinite(b[k]):
+        errs.append('"{0:s}" should be a number'.format(pfx + k))
+        return None
+    if (lo is not None and not b[k] > lo) or (hi is not None and not b[k] < hi):
+        errs.append('"{0:s}" should be within ({1:s}, {2:s}), but is {3:s}'.format(pfx + k, str(lo), str(hi), str(b[k])))
+        return None
+    return float(b[k])
+
+def bounds(a, rootChord):
+    """Return the LE positions and the chords of the stations of a body
+    """
+    chord = rootChord * np.cumprod(np.append(1., a['taper']))
+    yLe = np.append(0., np.cumsum(a['span']))
+    xLe = a['offset'][0] + np.append(0., np.cumsum(np.tan(a['sweep']*np.pi/180) * a['span']))
+    zLe = a['offset'][1] + np.append(0., np.cumsum(np.tan(a['dihedral']*np.pi/180) * a['span']))
+    return xLe, yLe, zLe, chord
+
+def errors(p):
+    """Return the list of errors found in a parameter dictionary (sizes, types, ranges and domain consistency)
+    """
+    import re
+    errs = []
+    # airfoils define the number of planforms
+    a = planform(p, errs)
+    if a is None:
+        return errs
+    # domain type
+    domType = p.get('domType')
+    if domType not in _domains:
+        errs.append('"domType" should be either "box" or "sphere", but "{0:s}" was given'.format(str(domType)))
+        domType = None
+    # scalars
+    s = {}
+    for k, (lo, hi, req) in _scalars.items():
+        if k not in p:
+            if req or (domType is not None and k in _domains[domType]):
+                errs.append('"{0:s}" is missing'.format(k))
+            continue
+        if k == 'airfTol' and p[k] is None:
+            continue
+        v = scalar(p, k, lo, hi, errs)
+        if v is not None:
+            s[k] = v
+    if not isinstance(p.get('coWingtip'), bool):
+        errs.append('"coWingtip" should be a boolean')
+    elif not p['coWingtip']:
+        errs.append('"coWingtip" should be True, since rounded wingtips are not implemented yet')
+    if not isinstance(p.get('sizeFields', False), bool):
+        errs.append('"sizeFields" should be a boolean')
+    if domType == 'box':
+        if isinstance(p.get('nSlope'), bool) or not isinstance(p.get('nSlope'), (int, np.integer)) or p['nSlope'] < 1:
+            errs.append('"nSlope" should be a positive integer')
+    # additional bodies
+    bodies = []
+    if not isinstance(p.get('bodies', []), list) or not all([isinstance(b, dict) for b in p.get('bodies', [])]):
+        errs.append('"bodies" should be a list of tables of parameters')
+    else:
+        names = ['wing']
+        for k in range(0, len(p.get('bodies', []))):
+            b = p['bodies'][k]
+            pfx = 'bodies[{0:d}].'.format(k)
+            errs += ['"{0:s}" is not a body parameter'.format(pfx + x) for x in b if x not in _body]
+            if not isinstance(b.get('name'), str) or not re.fullmatch('[A-Za-z][A-Za-z0-9]*', b['name']) or b['name'] in names:
+                errs.append('"{0:s}name" should be a unique alphanumeric name, other than {1:s}'.format(pfx, ', '.join(names)))
+            else:
+                names.append(b['name'])
+            ba = planform(b, errs, pfx)
+            if 'rootChord' not in b:
+                errs.append('"{0:s}rootChord" is missing'.format(pfx))
+            else:
+                c = scalar(b, 'rootChord', 0., None, errs, pfx)
+                if ba is not None and c is not None:
+                    bodies.append((ba, c))
+    if errs or domType is None:
+        return errs
+    # domain consistency, from the planform bounding box of all the bodies (LE positions, and chords ignoring twist)
+    # the box must enclose the LEs along z (the twist is applied about them), the airfoil thickness being checked by validate once the airfoils are read
+    xLe, yLe, zLe, chord = [np.concatenate(x) for x in zip(*[bounds(ba, c) for ba, c in [(a, s['rootChord'])] + bodies])]
+    xMin, xMax = np.min(xLe), np.max(xLe + chord)
+    zMin, zMax = np.min(zLe), np.max(zLe)
+    if domType == 'box':
+        if not s['xoBox'] < xMin:
+            errs.append('"xoBox" ({0:f}) should be upstream of the wing leading edge ({1:f})'.format(s['xoBox'], xMin))
+        if not s['xfBox'] > xMax:
+            errs.append('"xfBox" ({0:f}) should be downstream of the wing trailing edge ({1:f})'.format(s['xfBox'], xMax))
+        if not s['yfBox'] > np.max(yLe):
+            errs.append('"yfBox" ({0:f}) should be larger than the half-wing span ({1:f})'.format(s['yfBox'], np.max(yLe)))
+        if not (s['zoBox'] < zMin and s['zfBox'] > zMax):
+            errs.append('"zoBox" and "zfBox" ({0:f}, {1:f}) should enclose the wing leading edges ({2:f}, {3:f})'.format(s['zoBox'], s['zfBox'], zMin, zMax))
+    else:
+        ext = np.max(np.hypot(np.hypot(np.append(xLe, xLe + chord) - s['rootChord'], np.append(yLe, yLe)), np.append(zLe, zLe))) # from the sphere center, at the root TE
+        if not s['rSphere'] > ext:
+            errs.append('"rSphere" ({0:f}) should be larger than the wing extent ({1:f})'.format(s['rSphere'], ext))
+    return errs
+
+def check(p):
+    """Raise an exception listing all the errors found in a parameter dictionary
+    """
+    errs = errors(p)
+    if errs:
+        raise Exception('params: invalid parameters!\n' + ''.join([' - ' + e + '\n' for e in errs]))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Create an unstructured tetrahedral grid around a wing
+# to be meshed with gmsh for Flow or SU2 CFD solvers
+# Adrien Crovato
+
+# methods instrumented in each class, in addition to the write* methods
+_methods = ['__init__', 'compShape', 'initData', 'specPts', 'simplify', 'load', 'get', 'save', 'emit', 'close']
+# counters updated by the instrumented methods (bytes written and entities added)
+_counters = ['bytes', 'points', 'lines', 'loops', 'surfaces', 'sloops', 'volumes']
+
+## Per-stage profiler
+# Wrap the stages of the generation (functions of geoGen, methods of the components, writers and caches),
+# and record the wall time, the peak memory and number of allocated blocks (tracemalloc), the bytes
+# written and the number of entities added by each stage. The stages are only wrapped while the
+# profiler is installed, so that the generation is not slowed down otherwise
+#
+# Adrien Crovato
+class Profiler:
+    def __init__(self):
+        self.stats = {} # statistics of each stage, indexed by path (tuple of nested stage names)
+        self.stack = [] # stages being run, as [path, start time, start memory, start blocks, peak memory]
+        self.patched = [] # wrapped attributes, as (owner, name, original)
+
+    def install(self, main):
+        """Wrap the stages of the generation, main being the geoGen module run, and start tracing allocations
+        """
+        import tracemalloc
+        import airfoil as af, wing as w, tip as t, wake as wk, domain as d, writer as wr, geometry as g, memo as m, export as ex, validate as v
+        for f in ['main', 'getConfig', 'readAirfoils', 'build', 'assemble']:
+            self.wrap(main, f, f)
+        self.wrap(ex, 'write', 'export')
+        self.wrap(v, 'errors', 'validate')
+        for cls in [af.Loader, w.Wing, t.Tip, t.CTip, wk.GWake, wk.Wake, d.Domain, d.Sphere, d.Box, g.Geometry, wr.GeoWriter, wr.GmshWriter, m.Memo]:
+            for f in list(cls.__dict__):
+                if callable(cls.__dict__[f]) and (f in _methods or (f.startswith('write') and cls not in [g.Geometry, wr.GeoWriter])):
+                    self.wrap(cls, f, cls.__name__ + '.' + f)
+        # counters
+        self.count(g.Geometry, 'record', lambda args: (args[1], args[3] - args[2]))
+        self.count(wr.GeoWriter, 'write', lambda args: ('bytes', len(args[1])))
+        tracemalloc.start()
+
+    def uninstall(self):
+        """Restore the stages and stop tracing allocations
+        """
+        import tracemalloc
+        tracemalloc.stop()
+        for owner, name, fun in reversed(self.patched):
+            setattr(owner, name, fun)
+        self.patched = []
+
+    def wrap(self, owner, name, label):
+        """Replace a function by a timed version
+        """
+        fun = getattr(owner, name)
+        prof = self
+        def timed(*args, **kwargs):
+            prof.enter(label)
+            try:
+                return fun(*args, **kwargs)
+            finally:
+                prof.exit()
+        self.patched.append((owner, name, fun))
+        setattr(owner, name, timed)
+
+    def count(self, owner, name, what):
+        """Replace a function by a version updating a counter of the running stages
+        what returns the counter name and increment from the function arguments
+        """
+        fun = owner.__dict__[name]
+        prof = self
+        def counted(*args):
+            k, v = what(args)
+            for s in prof.stack:
+                prof.stats[s[0]][k] += v
+            return fun(*args)
+        self.patched.append((owner, name, fun))
+        setattr(owner, name, counted)
+
+    def enter(self, label):
+        """Start a stage
+        """
+        import sys, time, tracemalloc
+        path = (self.stack[-1][0] if self.stack else ()) + (label,)
+        if path not in self.stats:
+            self.stats[path] = dict({'calls': 0, 'time': 0., 'peak': 0, 'blocks': 0}, **{k: 0 for k in _counters})
+        mem, peak = tracemalloc.get_traced_memory()
+        if self.stack:
+            self.stack[-1][4] = max(self.stack[-1][4], peak)
+        tracemalloc.reset_peak()
+        self.stack.append([path, time.perf_counter(), mem, sys.getallocatedblocks(), mem])
+
+    def exit(self):
+        """End the current stage
+        """
+        import sys, time, tracemalloc
+        path, t0, mem, blocks, peak = self.stack.pop()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        s = self.stats[path]
+        s['calls'] += 1
+        s['time'] += time.perf_counter() - t0
+        s['peak'] = max(s['peak'], peak - mem)
+        s['blocks'] += sys.getallocatedblocks() - blocks
+        if self.stack:
+            self.stack[-1][4] = max(self.stack[-1][4], peak)
+
+    def report(self):
+        """Return the summary table of the stages, in order of first call, nested stages being indented
+        """
+        lines = ['{0:<40s} {1:>6s} {2:>10s} {3:>10s} {4:>10s} {5:>10s} {6:>8s} {7:>8s} {8:>8s}'.format('stage', 'calls', 'time [ms]', 'peak [kB]', 'blocks', 'bytes', 'points', 'lines', 'surfaces')]
+        for path, s in self.stats.items():
+            lines.append('{0:<40s} {1:6d} {2:10.3f} {3:10.1f} {4:10d} {5:10d} {6:8d} {7:8d} {8:8d}'.format(('  ' * (len(path)-1) + path[-1])[:40], s['calls'], 1000*s['time'], s['peak']/1024, s['blocks'], s['bytes'], s['points'], s['lines'], s['surfaces']))
+        return '\n'.join(lines)
+
+    def dump(self, fname):
+        """Write the statistics of the stages to a JSON file
+        """
+        import json
+        file = open(fname, 'w')
+        json.dump([dict({'stage': list(path)}, **s) for path, s in self.stats.items()], file, indent=1)
+        file.close()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Compute the derivatives of the point coordinates with respect to the planform parameters,
+# analytically from the transform chain of the wing stations (wing.transform)
+# Adrien Crovato
+
+import numpy as np
+
+# planform parameters, in the order of the columns of the Jacobians (angles in degrees)
+_params = ['span', 'taper', 'sweep', 'dihedral', 'twist', 'rootChord', 'offset']
+
+def names(n, pfx=''):
+    """Return the names of the columns of the Jacobian of a wing of n stations
+    """
+    sizes = {'span': n-1, 'taper': n-1, 'sweep': n-1, 'dihedral': n-1, 'twist': n, 'offset': 2}
+    cols = []
+    for k in _params:
+        cols += [pfx + k] if k == 'rootChord' else ['{0:s}{1:s}[{2:d}]'.format(pfx, k, i) for i in range(0, sizes[k])]
+    return cols
+
+def jacobian(p, wing, tip, wake, dom, geom):
+    """Return the names of the parameters and the Jacobian of all the points, as an array of size [nPoints, 3, nParams]
+    aligned with the point IDs of the geometry (geom.ptsId), the points not depending on the planform having zero derivatives
+    The columns hold the parameters of the main wing, then those of each additional body
+    """
+    import domain as d
+    cols = names(wing.n)
+    blocks = [] # (IDs, first column, Jacobian)
+    # wing, wingtip and wake
+    dW = ofWing(wing, p)
+    dT = ofTip(tip, dW)
+    blocks += [(wing.ptsId, 0, dW), (tip.ptsN[0], 0, dT)]
+    if hasattr(wake, 'pts'):
+        blocks.append((wake.ptsN[0], 0, ofWake(wake, p['nSlope'], dW, dT)))
+    # additional bodies
+    for k in range(0, len(dom.bodies)):
+        bw, bt = dom.bodies[k]
+        dBw = ofWing(bw, p['bodies'][k])
+        blocks += [(bw.ptsId, len(cols), dBw), (bt.ptsN[0], len(cols), ofTip(bt, dBw))]
+        cols += names(bw.n, 'bodies[{0:d}].'.format(k))
+    # sphere, centered on the root TE
+    if isinstance(dom, d.Sphere):
+        dS = np.zeros([3, 3, len(cols)])
+        dS[:,0,cols.index('rootChord')] = 1
+        blocks.append((np.array([dom.ptsN[0][0], dom.ptsN[1][0], dom.ptsN[1][2]]), 0, dS))
+        blocks.append((dom.ptsN[2], 0, dS[0:1]))
+    # align with the point IDs
+    geom.close()
+    order = np.argsort(geom.ptsId, kind='stable')
+    jac = np.zeros([geom.ptsId.shape[0], 3, len(cols)])
+    for ids, c0, dB in blocks:
+        jac[order[np.searchsorted(geom.ptsId[order], ids)], :, c0:c0+dB.shape[2]] = dB
+    return cols, jac
+
+def ofWing(w, b):
+    """Return the Jacobian of the points of a wing, stacked as their coordinates (array of size [nPoints, 3, nParams]), given its parameters b
+    The points of station i are the airfoil coordinates (a, b) scaled by the chord c_i and twisted,
+    x = c_i*(a*cos(t_i) + b*sin(t_i)), z = c_i*(-a*sin(t_i) + b*cos(t_i)), then translated to the LE of the station,
+    which is moved behind the LE of the previous station (minimum of x) by the span and sweep, and raised by the span and dihedral.
+    The derivatives of (x, z) being linear in (x, z), they are computed from the transformed points, without the airfoils
+    """
+    n = w.n
+    nP = n-1
+    iS, iT, iSw, iD, iTw, iR, iO = 0, nP, 2*nP, 3*nP, 4*nP, 5*nP+1, 5*nP+2
+    deg = np.pi/180
+    span = np.asarray(b['span'], dtype=float)
+    taper = np.asarray(b['taper'], dtype=float)
+    sweep = np.asarray(b['sweep'], dtype=float) * deg
+    dihedral = np.asarray(b['dihedral'], dtype=float) * deg
+    offset = np.asarray(b['offset'], dtype=float)
+    nCol = 5*nP+4
+    # derivatives of the local coordinates (x, z) of each station, as coefficients of x and z (Ax, Az)
+    Ax = np.zeros([n, 3, nCol])
+    Az = np.zeros([n, 3, nCol])
+    for i in range(0, n):
+        Ax[i,0,iR] = Az[i,2,iR] = 1 / b['rootChord'] # scaling by the chord
+        Ax[i,0,iT:iT+i] = Az[i,2,iT:iT+i] = 1 / taper[0:i]
+        Az[i,0,iTw+i] = deg # twist
+        Ax[i,2,iTw+i] = -deg
+    # translation of each station, from its LE (first minimum of x, see wing.transform)
+    sta = np.repeat(np.arange(n), np.diff(w.ptr)) # station of each point
+    first = np.flatnonzero(w.ptsX[:,0] == np.minimum.reduceat(w.ptsX[:,0], w.ptr[:-1])[sta])
+    le = w.ptsX[first[np.searchsorted(first, w.ptr[:-1])], :]
+    dz = np.cumsum(np.append(0., np.tan(dihedral)*span))
+    dx = np.append(0., le[:-1,0] - offset[0] + np.tan(sweep)*span)
+    xLe = le[:,0] - dx - offset[0]
+    zLe = le[:,2] - dz - offset[1]
+    dStep = xLe[:,None]*Ax[:,0,:] + zLe[:,None]*Az[:,0,:] # LE to LE x-translation between successive stations
+    dStep[0:nP,iS:iS+nP] += np.diag(np.tan(sweep))
+    dStep[0:nP,iSw:iSw+nP] += np.diag(span * deg / np.cos(sweep)**2)
+    T = np.zeros([n, 3, nCol])
+    T[1:,0,:] = np.cumsum(dStep[:-1,:], axis=0)
+    T[:,0,iO] = 1
+    low = np.tri(n, nP, -1) # stations outboard of each planform
+    T[:,1,iS:iS+nP] = low
+    T[:,2,iS:iS+nP] = low * np.tan(dihedral)
+    T[:,2,iD:iD+nP] = low * span * deg / np.cos(dihedral)**2
+    T[:,2,iO+1] = 1
+    # points of all the stations at once
+    x = w.ptsX[:,0] - (dx + offset[0])[sta]
+    z = w.ptsX[:,2] - (dz + offset[1])[sta]
+    return x[:,None,None]*Ax[sta] + z[:,None,None]*Az[sta] + T[sta]
+
+def ofTip(t, dW):
+    """Return the Jacobian of the wingtip mean line, given the Jacobian of the wing
+    """
+    d = dW[t.wing.station(-1)]
+    m = t.pts[0].shape[0]
+    dT = 0.5*(d[1:1+m] + d[::-1][1:1+m])
+    dT[:,1,:] = d[0,1,:]
+    return dT
+
+def ofWake(wk, nSlope, dW, dT):
+    """Return the Jacobian of the wake points, given the Jacobians of the wing and wingtip
+    The downstream points are extended from the TE with the mean slope of the upper and lower sides (see wake.Wake)
+    """
+    w = wk.wing
+    n = w.n
+    xF = wk.pts[0][0,0]
+    te = w.ptsX[w.ptr[:-1], :]
+    dTe = dW[w.ptr[:-1]]
+    dLe = dW[w.ptr[:-1] + w.sptsNl[:,3]]
+    sU, dSU = slopes(w.ptsX[w.ptr[:-1]+nSlope, :], dW[w.ptr[:-1]+nSlope], te, dTe)
+    sL, dSL = slopes(w.ptsX[w.ptr[1:]-nSlope-1, :], dW[w.ptr[1:]-nSlope-1], te, dTe)
+    dN = np.zeros((wk.pts[0].shape[0],) + dTe.shape[1:])
+    dN[0:n,1,:] = dTe[:,1,:]
+    dN[0:n,2,:] = dTe[:,2,:] + 0.5*(dSU+dSL)*(xF - te[:,0])[:,None] - 0.5*(sU+sL)[:,None]*dTe[:,0,:]
+    dN[n,2,:] = dTe[-1,2,:]
+    dN[n+1,[0,2],:] = dTe[-1,[0,2],:]
+    dN[n+2,[0,2],:] = dT[wk.tip.sptsN[0][0],[0,2],:]
+    dN[n+3,[0,2],:] = dT[wk.tip.sptsN[0][1],[0,2],:]
+    dN[n+4,[0,2],:] = dLe[-1,[0,2],:]
+    dN[n+5,2,:] = dLe[-1,2,:]
+    dN[n+6:,1,:] = dTe[::-1,1,:]
+    dN[n+6:,2,:] = dLe[::-1,2,:]
+    return dN
+
+def slopes(pts, dPts, te, dTe):
+    """Return the slopes of the segments from the TE to some points, and their derivatives
+    """
+    dx = pts[:,0] - te[:,0]
+    dz = pts[:,2] - te[:,2]
+    ds = (dPts[:,2,:] - dTe[:,2,:]) / dx[:,None] - (dz / dx**2)[:,None] * (dPts[:,0,:] - dTe[:,0,:])
+    return dz / dx, ds
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Serve geometry requests, sent as JSON lines over a Unix socket or stdin,
+# from a long-running process keeping the airfoils and components in memory
+# Adrien Crovato
+
+import airfoil as af
+import cache as c
+import geoGen
+import memo as m
+import writer as wr
+
+# maximum length of a request line (bytes)
+_limit = 64*1024*1024
+
+## Generation server
+# Each request is a JSON object on one line, with the optional keys
+#  - config: config file (.py, .json or .toml), relative to cwd
+#  - params: parameters overriding those of the config (or all the parameters, without config)
+#  - name: name written in the header of the .geo file (default: config name)
+#  - output: .geo file to write, relative to cwd (the .geo text is returned otherwise)
+#  - strict: whether to fail if the built geometry is invalid (otherwise its errors are returned as warnings)
+#  - cwd: working directory of the client
+#  - id: identifier echoed in the response
+# and is answered by a JSON object on one line, holding the path of the written file (file) or the .geo text (geo)
+# and the validation errors (warnings) if any, or the error message (error). Clients are served concurrently, but the generation is run by one worker thread,
+# since the component cache cannot be shared by concurrent calls
+#
+# Adrien Crovato
+class Server:
+    def __init__(self, nMax=64):
+        import concurrent.futures
+        self.loader = af.Loader(c.cacheDir('airfoils')) # airfoils parsed by previous requests, keyed by content
+        self.memo = m.Memo(c.cacheDir('components')) # components built by previous requests
+        self.nMax = nMax # maximum number of components held in memory
+        odir = c.cacheDir('outputs')
+        self.store = None if odir is None else c.Store(odir, geoGen._outSize) # output cache
+        self.configs = {} # raw parameters of the config files, keyed by path and modification time
+        self.worker = concurrent.futures.ThreadPoolExecutor(1)
+
+    def getConfig(self, fname):
+        """Return the raw parameters of a config file, loaded once per modification of the file
+        """
+        import copy, os
+        root, ext = os.path.splitext(fname)
+        st = os.stat(fname if ext in ['.json', '.toml', '.py'] else fname + '.py')
+        key = (os.path.abspath(fname), st.st_mtime_ns, st.st_size)
+        if key not in self.configs:
+            self.configs = {k: v for k, v in self.configs.items() if k[0] != key[0]}
+            self.configs[key] = geoGen.loadConfig(fname)
+        return copy.deepcopy(self.configs[key])
+
+    def generate(self, req):
+        """Answer a request
+        """
+        import ntpath, os
+        import params
+        cwd = req.get('cwd', os.getcwd())
+        over = req.get('params', {})
+        if not isinstance(over, dict):
+            raise Exception('Server: "params" should be a dictionary of parameters!\n')
+        # parameters
+        if req.get('config'):
+            cfg = os.path.join(cwd, req['config'])
+            p = self.getConfig(cfg)
+            p.update(over)
+            name = req.get('name', ntpath.basename(cfg[:-3] if cfg.endswith('.py') else cfg))
+            dname = os.path.dirname(cfg)
+        else:
+            import copy
+            p = copy.deepcopy(over)
+            name = req.get('name', 'geoGen')
+            dname = cwd
+        params.check(p)
+        geoGen.fixPaths(p, dname)
+        # output, served from the output cache if unchanged
+        fname = None
+        if req.get('output'):
+            fname = os.path.join(cwd, req['output'])
+            if self.store is not None:
+                key = geoGen.outputKey(p, name)
+                if self.store.place(key, '.geo', fname):
+                    return {'file': os.path.abspath(fname), 'cached': True}
+        # generation, from the airfoils and components kept in memory, validated before writing
+        airfoils = {f: self.loader.load(f) for f in set(geoGen.airfNames(p))}
+        try:
+            wing, tip, wake, dom = geoGen.build(p, airfoils, self.memo)
+            errs = geoGen.check(p, wing, tip, wake, dom, req.get('strict', False))
+            outFile = wr.GeoWriter(fname)
+            geoGen.write(outFile, name, wing, tip, wake, dom, self.memo)
+            if fname is None:
+                resp = {'geo': outFile.getvalue()}
+            else:
+                outFile.close()
+                resp = {'file': os.path.abspath(fname)}
+        finally:
+            self.memo.trim(self.nMax)
+        if errs:
+            resp['warnings'] = errs
+        elif fname is not None and self.store is not None:
+            geoGen.storeOutput(self.store, key, fname)
+        return resp
+
+    async def answer(self, line):
+        """Return the response to a request line, as a line
+        """
+        import asyncio, json, time
+        t0 = time.perf_counter()
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict):
+                raise ValueError('request should be a JSON object')
+        except ValueError as e:
+            return json.dumps({'error': 'Server: invalid request ({0:s})!'.format(str(e))}) + '\n'
+        try:
+            resp = await asyncio.get_running_loop().run_in_executor(self.worker, self.generate, req)
+        except Exception as e:
+            resp = {'error': ' '.join([str(a).strip() for a in e.args])}
+        resp['time'] = time.perf_counter() - t0
+        if 'id' in req:
+            resp['id'] = req['id']
+        return json.dumps(resp) + '\n'
+
+    async def client(self, reader, writer):
+        """Answer the requests of a client, in order, until it disconnects
+        """
+        import asyncio
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    writer.write((await self.answer(line)).encode())
+                    await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path):
+        """Serve the clients connecting to a Unix socket until interrupted
+        """
+        import asyncio, os, signal, socket, stat
+        if os.path.exists(path):
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise Exception('Server:', path, 'exists and is not a socket!\n')
+            probe = socket.socket(socket.AF_UNIX)
+            try:
+                probe.connect(path)
+                raise Exception('Server: another server is listening on', path, '!\n')
+            except OSError:
+                os.remove(path) # stale socket
+            finally:
+                probe.close()
+        umask = os.umask(0o077) # socket only accessible to its owner
+        try:
+            srv = await asyncio.start_unix_server(self.client, path, limit=_limit)
+        finally:
+            os.umask(umask)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel) # clean exit on termination
+        try:
+            await srv.serve_forever()
+        finally:
+            srv.close()
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def serveStdin(self):
+        """Answer the requests read from stdin on stdout, in order, until end of file
+        """
+        import asyncio, sys
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=_limit)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                sys.stdout.write(await self.answer(line))
+                sys.stdout.flush()
+
+def main(path=None, nMax=64):
+    """Run the server on a Unix socket (default: client.socketPath()), or on stdin/stdout if path is '-'
+    """
+    import asyncio, sys
+    import client as cl
+    srv = Server(nMax)
+    if path == '-':
+        asyncio.run(srv.serveStdin())
+        return
+    if path is None:
+        path = cl.socketPath()
+    print('geoGen server listening on', path, file=sys.stderr)
+    try:
+        asyncio.run(srv.serve(path))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
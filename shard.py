@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Write the geometry as a master .geo file including one file per component section
+# (split in chunks of entities for the largest ones), formatted by a pool of worker processes
+# Adrien Crovato
+
+import writer as wr
+
+# records of entity ranges
+_ranges = ['points', 'lines', 'loops', 'surfaces', 'sloops', 'volumes']
+# geometry whose records are formatted, set once in each worker
+_geom = None
+
+def split(geom, chunk):
+    """Return the shards of a geometry, as a list of (name, records)
+    A shard starts at each section comment ('// --- Name ---') written by the components,
+    and is split so that each of its parts holds at most about chunk entities
+    """
+    import re
+    geom.close()
+    # sections
+    sections = [['header', []]]
+    for e in geom.events:
+        if e[0] == 'write' and e[1].startswith('// --- '):
+            sections.append([re.sub('[^a-z0-9]+', '_', e[1].strip('/- \n').lower()).strip('_'), []])
+        sections[-1][1].append(e)
+    # chunks
+    shards = []
+    for name, events in sections:
+        if not events:
+            continue
+        parts = [[]]
+        n = 0
+        for e in events:
+            if e[0] in _ranges:
+                a = e[1]
+                while a < e[2]:
+                    if n >= chunk:
+                        parts.append([])
+                        n = 0
+                    b = min(e[2], a + chunk - n)
+                    parts[-1].append([e[0], a, b])
+                    n += b - a
+                    a = b
+            else:
+                parts[-1].append(e)
+                n += 1
+        for k in range(0, len(parts)):
+            shards.append((name if len(parts) == 1 else '{0:s}_{1:d}'.format(name, k), parts[k]))
+    return shards
+
+def write(fname, geom, nProc=None, chunk=50000):
+    """Write the geometry to a master .geo file including the shards, formatted using nProc worker processes (all cores by default)
+    The shards are written to a new directory next to the master file, which is then replaced atomically,
+    so that the master file always includes a complete set of shards. The shards of the previous master file are removed
+    Return the path of the shard directory
+    """
+    import multiprocessing, os, re, shutil, uuid
+    dname, bname = os.path.split(os.path.abspath(fname))
+    stem = os.path.splitext(bname)[0]
+    sdir = '{0:s}.{1:s}'.format(stem, uuid.uuid4().hex[0:8])
+    tmp = os.path.join(dname, '.' + sdir + '.tmp')
+    # format shards
+    shards = split(geom, chunk)
+    width = len(str(len(shards)-1))
+    jobs = [(os.path.join(tmp, '{0:0{1:d}d}_{2:s}.geo'.format(k, width, shards[k][0])), shards[k][1]) for k in range(0, len(shards))]
+    os.mkdir(tmp)
+    try:
+        if nProc is None:
+            nProc = os.cpu_count()
+        if nProc > 1:
+            pool = multiprocessing.Pool(min(nProc, len(jobs)), initializer=init, initargs=(geom,))
+            try:
+                pool.map(emit, sorted(jobs, key=lambda j: -size(j[1])), chunksize=1) # largest shards first
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            init(geom)
+            for job in jobs:
+                emit(job)
+        os.rename(tmp, os.path.join(dname, sdir))
+    except:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    # commit master file
+    try:
+        master = wr.GeoWriter(fname)
+        for job in jobs:
+            master.write('Include "{0:s}/{1:s}";\n'.format(sdir, os.path.basename(job[0])))
+        master.close()
+    except:
+        shutil.rmtree(os.path.join(dname, sdir), ignore_errors=True)
+        raise
+    # remove previous shards
+    for f in os.listdir(dname):
+        if f != sdir and re.fullmatch(re.escape(stem) + r'\.[0-9a-f]{8}', f) and os.path.isdir(os.path.join(dname, f)):
+            shutil.rmtree(os.path.join(dname, f), ignore_errors=True)
+    return os.path.join(dname, sdir)
+
+def size(events):
+    """Return the number of records and entities of a shard
+    """
+    return sum([e[2] - e[1] if e[0] in _ranges else 1 for e in events])
+
+def init(geom):
+    """Store the geometry in the worker
+    """
+    global _geom
+    _geom = geom
+
+def emit(job):
+    """Format the records of one shard to its file
+    """
+    fname, events = job
+    outFile = wr.GeoWriter(fname)
+    _geom.emit(outFile, events)
+    outFile.close()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Generate the geometries of a parametric study
+# using a pool of worker processes
+# Adrien Crovato
+
+import geoGen
+import cache
+import writer as wr
+import params
+
+# base parameters, airfoil data, hashes of the airfoil files and output cache, set once in each worker
+_base = None
+_data = None
+_hashes = None
+_store = None
+
+def main(_module, _sweep, _output, nProc, strict=False):
+    import json, os, time
+    # Get config and sweep definition
+    p = geoGen.getConfig(_module)
+    file = open(_sweep, 'r')
+    s = json.load(file)
+    file.close()
+
+    # Generate in workspace
+    wdir = geoGen.createWdir()
+    prefix = os.path.splitext(_output)[0]
+    t0 = time.perf_counter()
+    manifest = run(p, s.get('ranges'), s.get('cases'), wdir, prefix, os.path.basename(_module), nProc, strict, os.path.dirname(_module))
+
+    # Printout
+    nFail = len([c for c in manifest if 'error' in c])
+    print('*' * 79)
+    print('* geoGen sweep')
+    print('*' * 79)
+    print('{0:d} cases generated in {1:f}s, {2:d} failed, {3:d} served from the output cache'.format(len(manifest)-nFail, time.perf_counter()-t0, nFail, len([c for c in manifest if c.get('cached')])))
+    for c in manifest:
+        if 'error' in c:
+            print('case {0:d} failed: {1:s}'.format(c['case'], c['error']))
+        for e in c.get('warnings', []):
+            print('case {0:d} warning: {1:s}'.format(c['case'], e))
+    print(os.path.join(wdir, prefix + '_manifest.json'), 'has been successfully written!')
+    print('*' * 79)
+
+def expand(ranges=None, cases=None):
+    """Return the list of cases, each case being a dictionary of parameters overriding the base config
+    ranges maps parameter names to lists of values, and is expanded as their cartesian product
+    """
+    import itertools
+    cList = [] if cases is None else [dict(c) for c in cases]
+    if ranges:
+        keys = list(ranges.keys())
+        for vals in itertools.product(*[ranges[k] for k in keys]):
+            cList.append(dict(zip(keys, vals)))
+    if not cList:
+        raise Exception('sweep: no case to generate, "ranges" or "cases" must be given!\n')
+    return cList
+
+def run(p, ranges=None, cases=None, odir='.', prefix='case', name='sweep', nProc=None, strict=False, dname='.'):
+    """Generate the geometry of each case using nProc worker processes (all cores by default)
+    Airfoils are read once, the cases generated by a previous run are served from the output cache,
+    and the manifest mapping each case to its file and timing is returned
+    The built geometry of each case is validated, the invalid cases failing if strict, and being reported as warnings otherwise
+    The airfoils overridden by a case are resolved as those of the base config, relative to directory dname
+    """
+    import copy, json, multiprocessing, os
+    cList = expand(ranges, cases)
+    # validate all cases before generating any
+    errs = []
+    known = params.names()
+    for k in range(0, len(cList)):
+        q = dict(p)
+        q.update(cList[k])
+        e = ['unknown parameter "{0:s}"'.format(x) for x in cList[k] if x not in known] + params.errors(q)
+        if e:
+            errs.append('case {0:d}: {1:s}'.format(k, '; '.join(e)))
+    if errs:
+        raise Exception('sweep: {0:d} invalid case(s)!\n'.format(len(errs)) + ''.join([' - ' + e + '\n' for e in errs[0:10]]) + (' - ...\n' if len(errs) > 10 else ''))
+    # resolve the airfoils overridden by the cases, then read each distinct airfoil once
+    fnames = set(geoGen.airfNames(p))
+    for k in range(0, len(cList)):
+        if any([x in cList[k] for x in ['airfPath', 'airfName', 'bodies']]):
+            q = copy.deepcopy(dict(p, **cList[k]))
+            geoGen.fixPaths(q, dname)
+            cList[k] = {x: q[x] for x in cList[k]}
+        fnames.update(geoGen.airfNames(dict(p, **cList[k])))
+    data = geoGen.readAirfoils(fnames)
+    hashes = geoGen.airfHashes(fnames)
+    cdir = cache.cacheDir('outputs')
+    store = None if cdir is None else cache.Store(cdir, geoGen._outSize)
+    # define jobs
+    odir = os.path.abspath(odir)
+    width = len(str(len(cList)-1))
+    jobs = [(k, cList[k], os.path.join(odir, '{0:s}_{1:0{2:d}d}.geo'.format(prefix, k, width)), name, strict) for k in range(0, len(cList))]
+    # generate
+    if nProc is None:
+        nProc = os.cpu_count()
+    pool = multiprocessing.Pool(nProc, initializer=init, initargs=(p, data, hashes, store))
+    try:
+        manifest = pool.map(gen, jobs, chunksize=max(1, len(jobs)//(4*nProc)))
+    finally:
+        pool.close()
+        pool.join()
+    # write manifest
+    file = open(os.path.join(odir, prefix + '_manifest.json'), 'w')
+    json.dump(manifest, file, indent=1)
+    file.close()
+    return manifest
+
+def init(p, data, hashes=None, store=None):
+    """Store base parameters, airfoil data and output cache in the worker
+    """
+    global _base, _data, _hashes, _store
+    _base = p
+    _data = data
+    _hashes = hashes
+    _store = store
+
+def gen(job):
+    """Generate the geometry of one case and return its manifest entry
+    """
+    import copy, time
+    k, case, fname, name, strict = job
+    entry = {'case': k, 'params': case, 'file': fname}
+    t0 = time.perf_counter()
+    try:
+        p = copy.deepcopy(_base)
+        p.update(case)
+        if _store is not None:
+            key = geoGen.outputKey(p, name, _hashes)
+            if _store.place(key, '.geo', fname):
+                entry['cached'] = True
+                entry['time'] = time.perf_counter() - t0
+                return entry
+        wing, tip, wake, dom = geoGen.build(p, _data)
+        errs = geoGen.check(p, wing, tip, wake, dom, strict)
+        if errs:
+            entry['warnings'] = errs
+        outFile = wr.GeoWriter(fname)
+        geoGen.assemble(name, wing, tip, wake, dom).emit(outFile)
+        outFile.close()
+        if _store is not None and not errs:
+            geoGen.storeOutput(_store, key, fname)
+    except Exception as e:
+        entry['error'] = ' '.join([str(a).strip() for a in e.args])
+    entry['time'] = time.perf_counter() - t0
+    return entry
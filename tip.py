@@ -29,140 +29,106 @@ import numpy as np
 #
 # Adrien Crovato
 class Tip:
-    def __init__(self, _wing):
+    def __init__(self, _wing, _num):
         self.wing = _wing
+        self.num = _num
 
         self.initData()
 
     def initData(self):
         """Initialize data, define numbering
         """
-        # build mean line
-        self.pts = [(np.zeros([(self.wing.pts[-1].shape[0]-3)//2,3]))]
-        for i in range(0, self.pts[0].shape[0]):
-            self.pts[0][i,:] = np.array([0.5*(self.wing.pts[-1][1+i,0]+self.wing.pts[-1][-2-i,0]), self.wing.pts[-1][0,1], 0.5*(self.wing.pts[-1][1+i,2]+self.wing.pts[-1][-2-i,2])])
-
-        # define point numbering (max. (499-3)/2 more points: 5101-5348)
-        self.ptsN = [np.arange(5101, 5101+self.pts[0].shape[0])]
-        # define line numbering (7 lines: 121-127)
-        self.linN = [np.arange(121, 128)]
-        # define surface numbering (6 surfaces: 71-76)
-        self.surN = [np.arange(71, 77)]
+        import wing as w
+        # build mean line (between the ith upper and lower points, from the TE)
+        pts = self.wing.ptsX[self.wing.station(-1), :]
+        m = (pts.shape[0]-3)//2
+        self.pts = [0.5*(pts[1:1+m,:] + pts[::-1][1:1+m,:])]
+        self.pts[0][:,1] = pts[0,1]
+
+        # define point numbering ((n-3)/2 points for an airfoil of n points)
+        self.ptsN = [self.num.points(self.pts[0].shape[0])]
+        # define line numbering (7 lines)
+        self.linN = [self.num.lines(7)]
+        # define surface numbering (6 surfaces)
+        self.surN = [self.num.surfaces(6)]
 
         # fraction of the chord defining separation points (could be given as user-def params)
         sepFwd = 0.3
         sepAft = 0.9
-        # find and store separation poins
-        orgn = np.min(self.wing.pts[-1][:,0])
-        aft = np.argmin(np.abs(self.pts[0][:,0]-orgn - sepAft*self.wing.chord[-1]))
-        fwd = np.argmin(np.abs(self.pts[0][:,0]-orgn - sepFwd*self.wing.chord[-1]))
-        self.sptsN = [np.array([aft, fwd])]
+        # find and store separation poins (in the frame of the tip airfoil, before twist, if the wing is untwisted)
+        twist = self.wing.twist[-1] if self.wing.untwisted else 0.
+        orgn = np.min(w.chordwise(pts, twist))
+        self.sptsN = [w.nearest(-(w.chordwise(self.pts[0], twist)-orgn), [0, 0], [m, m], [-sepAft*self.wing.chord[-1], -sepFwd*self.wing.chord[-1]])]
 
 ## Handle cutoff wingtip data
 #
 # Adrien Crovato
 class CTip(Tip):
-    def __init__(self, _wing):
+    def __init__(self, _wing, _num):
 
-        Tip.__init__(self, _wing)
+        Tip.__init__(self, _wing, _num)
 
-    def writeInfo(self,fname):
+    def writeInfo(self, file):
         """Write wing geometrical parameters
         """
-        file = open(fname, 'a')
-        file.write('// --- Wingtip geometry ---\n')
+        file.write('// --- Wingtip geometry{0:s} ---\n'.format(self.wing.tag))
         file.write('// Cutoff wingtip\n')
         file.write('\n')
-        file.close()
 
-    def writePoints(self,fname):
+    def writePoints(self, file):
         """Write wing points
         """
-        file = open(fname, 'a')
-        file.write('// --- Wingtip points ---\n')
-        for i in range(0, self.sptsN[0][0]):
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[0][i], self.pts[0][i,0], self.pts[0][i,1], self.pts[0][i,2]))
-        file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},gr{4:d}*msTe{4:d}}};\n'.format(self.sptsN[0][0]+self.ptsN[0][0], self.pts[0][self.sptsN[0][0],0], self.pts[0][self.sptsN[0][0],1],self.pts[0][self.sptsN[0][0],2], self.wing.n-1))
-        for i in range(self.sptsN[0][0]+1, self.sptsN[0][1]):
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[0][i], self.pts[0][i,0], self.pts[0][i,1], self.pts[0][i,2]))
-        file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},gr{4:d}*msLe{4:d}}};\n'.format(self.sptsN[0][1]+self.ptsN[0][0], self.pts[0][self.sptsN[0][1],0], self.pts[0][self.sptsN[0][1],1],self.pts[0][self.sptsN[0][1],2], self.wing.n-1))
-        for i in range(self.sptsN[0][1]+1, self.ptsN[0].shape[0]):
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[0][i], self.pts[0][i,0], self.pts[0][i,1], self.pts[0][i,2]))
+        file.write('// --- Wingtip points{0:s} ---\n'.format(self.wing.tag))
+        sfx = np.full(self.ptsN[0].shape[0], '', dtype=object)
+        sfx[self.sptsN[0]] = ['{1:s}gr{0:d}*{1:s}msTe{0:d}'.format(self.wing.n-1, self.wing.pfx), '{1:s}gr{0:d}*{1:s}msLe{0:d}'.format(self.wing.n-1, self.wing.pfx)]
+        file.points(self.ptsN[0], self.pts[0], sfx)
         file.write('\n')
-        file.close()
 
-    def writeLines(self, fname):
+    def writeLines(self, file):
         """Write wing lines
         """
-        file = open(fname, 'a')
-        file.write('// --- Wingtip lines ---\n')
+        file.write('// --- Wingtip lines{0:s} ---\n'.format(self.wing.tag))
+        spts = self.wing.sepIds()[-1]
         # midlines
-        file.write('Spline({0:d}) = {{{1:d},'.format(self.linN[0][0], self.wing.ptsN[-1][self.wing.sptsNl[-1][0]]))
-        for i in range(0, self.sptsN[0][0]):
-            file.write('{0:d}, '.format(self.ptsN[0][i]))
-        file.write('{0:d}}};\n'.format(self.ptsN[0][self.sptsN[0][0]]))
-        file.write('Spline({0:d}) = {{{1:d},'.format(self.linN[0][1], self.ptsN[0][self.sptsN[0][0]]))
-        for i in range(self.sptsN[0][0]+1, self.sptsN[0][1]):
-            file.write('{0:d}, '.format(self.ptsN[0][i]))
-        file.write('{0:d}}};\n'.format(self.ptsN[0][self.sptsN[0][1]]))
-        file.write('Spline({0:d}) = {{{1:d},'.format(self.linN[0][2], self.ptsN[0][self.sptsN[0][1]]))
-        for i in range(self.sptsN[0][1]+1, self.ptsN[0].shape[0]):
-            file.write('{0:d}, '.format(self.ptsN[0][i]))
-        file.write('{0:d}}};\n'.format(self.wing.ptsN[-1][self.wing.sptsNl[-1][3]]))
+        file.spline(self.linN[0][0], [spts[0]] + self.ptsN[0][0:self.sptsN[0][0]+1].tolist())
+        file.spline(self.linN[0][1], self.ptsN[0][self.sptsN[0][0]:self.sptsN[0][1]+1])
+        file.spline(self.linN[0][2], self.ptsN[0][self.sptsN[0][1]:].tolist() + [spts[3]])
         # to-midlines
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linN[0][3], self.wing.sptsNg[-1][1], self.ptsN[0][self.sptsN[0][0]]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linN[0][4], self.wing.sptsNg[-1][2], self.ptsN[0][self.sptsN[0][1]]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linN[0][5], self.wing.sptsNg[-1][4], self.ptsN[0][self.sptsN[0][1]]))
-        file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linN[0][6], self.wing.sptsNg[-1][5], self.ptsN[0][self.sptsN[0][0]]))
+        file.line(self.linN[0][3], spts[1], self.ptsN[0][self.sptsN[0][0]])
+        file.line(self.linN[0][4], spts[2], self.ptsN[0][self.sptsN[0][1]])
+        file.line(self.linN[0][5], spts[4], self.ptsN[0][self.sptsN[0][1]])
+        file.line(self.linN[0][6], spts[5], self.ptsN[0][self.sptsN[0][0]])
         file.write('\n')
-        file.close()
 
-    def writeSurfaces(self, fname):
+    def writeSurfaces(self, file):
         """Write wing line loops and surfaces
         """
-        file = open(fname, 'a')
-        file.write('// --- Wingtip line loops and surfaces ---\n')
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d}}};\n'.format(self.surN[0][0], self.wing.linaN[-1][0], self.linN[0][3], -self.linN[0][0]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d}}};\n'.format(self.surN[0][1], self.wing.linaN[-1][1], self.linN[0][4], -self.linN[0][1], -self.linN[0][3]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d}}};\n'.format(self.surN[0][2], self.wing.linaN[-1][2], -self.linN[0][2], -self.linN[0][4]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d}}};\n'.format(self.surN[0][3], self.wing.linaN[-1][3], self.linN[0][5], self.linN[0][2]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d}}};\n'.format(self.surN[0][4], self.wing.linaN[-1][4], self.linN[0][6], self.linN[0][1], -self.linN[0][5]))
-        file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d}}};\n'.format(self.surN[0][5], self.wing.linaN[-1][5], self.linN[0][0], -self.linN[0][6]))
+        file.write('// --- Wingtip line loops and surfaces{0:s} ---\n'.format(self.wing.tag))
+        file.loop(self.surN[0][0], [self.wing.linaN[-1][0], self.linN[0][3], -self.linN[0][0]])
+        file.loop(self.surN[0][1], [self.wing.linaN[-1][1], self.linN[0][4], -self.linN[0][1], -self.linN[0][3]])
+        file.loop(self.surN[0][2], [self.wing.linaN[-1][2], -self.linN[0][2], -self.linN[0][4]])
+        file.loop(self.surN[0][3], [self.wing.linaN[-1][3], self.linN[0][5], self.linN[0][2]])
+        file.loop(self.surN[0][4], [self.wing.linaN[-1][4], self.linN[0][6], self.linN[0][1], -self.linN[0][5]])
+        file.loop(self.surN[0][5], [self.wing.linaN[-1][5], self.linN[0][0], -self.linN[0][6]])
         for i in range(0, self.surN[0].shape[0]):
-                file.write('Surface({0:d}) = {{-{0:d}}};\n'.format(self.surN[0][i]))
+                file.surface(self.surN[0][i], [-self.surN[0][i]])
         file.write('\n')
-        file.close()
 
-    def writePhysical(self, fname):
+    def writePhysical(self, file):
         """Write wing physical groups
         """
-        import os
-        file = open(fname, 'a')
-        file.write('// --- Wingtip physical groups ---\n')
-        file.write('Physical Surface("wing") += {')
-        for j in range(0, 3):
-            file.write('{0:d},'.format(self.surN[0][j]))
-        file.seek(0, os.SEEK_END)
-        file.seek(file.tell() - 1, os.SEEK_SET)
-        file.truncate()
-        file.write('};\n')
-        file.write('Physical Surface("wing_") += {')
-        for j in range(3, 6):
-            file.write('{0:d},'.format(self.surN[0][j]))
-        file.seek(0, os.SEEK_END)
-        file.seek(file.tell() - 1, os.SEEK_SET)
-        file.truncate()
-        file.write('};\n')
+        file.write('// --- Wingtip physical groups{0:s} ---\n'.format(self.wing.tag))
+        file.physical('Surface', self.wing.name, self.surN[0][0:3], True)
+        file.physical('Surface', self.wing.name + '_', self.surN[0][3:6], True)
         file.write('\n')
-        file.close()
 
 ## Handle rounded wingtip data
 #
 # Adrien Crovato
 class RTip(Tip):
-    def __init__(self, _wing):
+    def __init__(self, _wing, _num):
         
-        Tip.__init__(self, _wing)
+        Tip.__init__(self, _wing, _num)
 
         raise Exception('RTip: rounded wingtip not implemented yet!\n')
 
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Write the geometry as a static topology .geo file (lines, surfaces, volumes, physical groups)
+# including a coordinates file (constants, points and size fields), regenerated alone when only
+# the continuous parameters change
+# Adrien Crovato
+
+import writer as wr
+
+# records holding values that depend on the continuous parameters
+_values = ['write', 'constant', 'points', 'field', 'backgroundField']
+
+def split(geom):
+    """Return the records of the topology and of the coordinates, and the index of the topology record before which the coordinates are included
+    The records are split by section (starting at each '// --- ' comment), the sections holding only
+    comments, constants, points and size fields going to the coordinates, except for the header
+    """
+    geom.close()
+    sections = [[]]
+    for e in geom.events:
+        if e[0] == 'write' and e[1].startswith('// --- '):
+            sections.append([])
+        sections[-1].append(e)
+    topo, coords = list(sections[0]), []
+    pos = None
+    for s in sections[1:]:
+        if all([e[0] in _values for e in s]):
+            if pos is None:
+                pos = len(topo)
+            coords += s
+        else:
+            topo += s
+    return topo, coords, len(topo) if pos is None else pos
+
+def signature(geom, events):
+    """Return the hash of the entities defined by the coordinate records (point IDs and mesh sizes, constant names and size field structures)
+    The numeric values (coordinates, constants and size field parameters) are left out
+    """
+    import numpy as np
+    import memo as m
+    items = []
+    for e in events:
+        if e[0] == 'points':
+            items += ['points', geom.ptsId[e[1]:e[2]], np.array(geom.exprs, dtype=object)[geom.ptsSize[e[1]:e[2]]].tolist()]
+        elif e[0] == 'constant':
+            items += ['constant', e[1]]
+        elif e[0] == 'field':
+            items += ['field', e[1], e[2], [(name, val if isinstance(val, (list, str)) else None) for name, val in e[3]]] # entity lists and expressions
+        elif e[0] == 'backgroundField':
+            items += list(e)
+    return m.digest(*items)
+
+def write(fname, geom):
+    """Write the coordinates file next to the topology file, and the topology file if it does not exist yet
+    Refuse to write anything if the topology differs from the existing one
+    Return the path of the coordinates file
+    """
+    import os
+    topo, coords, pos = split(geom)
+    dname, bname = os.path.split(os.path.abspath(fname))
+    stem, ext = os.path.splitext(bname)
+    cname = stem + '.coords' + ext
+    # topology, identified by the entities of the coordinates
+    tFile = wr.GeoWriter()
+    include = [['write', '// --- Coordinates (topology {0:s}) ---\n'.format(signature(geom, coords))], ['write', 'Include "{0:s}";\n\n'.format(cname)]]
+    geom.emit(tFile, topo[0:pos] + include + topo[pos:])
+    txt = tFile.getvalue()
+    old = None
+    if os.path.exists(fname):
+        file = open(fname, 'r')
+        old = file.read()
+        file.close()
+        if old != txt:
+            raise Exception('topology: the topology of', fname, 'has changed (e.g. number of stations or points, domain type, bodies)! Remove it to write the new topology.\n')
+    # coordinates, then topology
+    cFile = wr.GeoWriter(os.path.join(dname, cname))
+    geom.emit(cFile, coords)
+    cFile.close()
+    if old is None:
+        tFile = wr.GeoWriter(fname)
+        tFile.write(txt)
+        tFile.close()
+    return os.path.join(dname, cname)
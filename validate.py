@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Validate the built components (airfoils, separation points, wake and domain extents)
+# before any geometry is written, so that broken cases never reach the mesher
+# Adrien Crovato
+
+import numpy as np
+
+# tolerance on the position of the TE and on its closure (fraction of the chord)
+_tol = 1e-3
+
+def errors(p, wing, tip, wake, dom):
+    """Return the list of errors found in the components built from a parameter dictionary
+    """
+    import domain as d
+    errs = []
+    bodies = [(wing, tip, p)] + [(dom.bodies[k][0], dom.bodies[k][1], p['bodies'][k]) for k in range(0, len(dom.bodies))]
+    for w, t, b in bodies:
+        for i in range(0, w.n):
+            errs += ['{0:s} station {1:d}: {2:s}'.format(w.name, i, e) for e in airfoil(w.ptsX[w.station(i), :], w.chord[i], b['twist'][i])]
+        errs += separations(w, t)
+    # wake slopes
+    if hasattr(wake, 'pts'):
+        errs += slopes(wing, p['nSlope'])
+        if not np.all(np.isfinite(wake.pts[0])):
+            errs.append('wake: points are not finite (TE slope computed from coincident points, "nSlope" too small?)')
+    # domain extents
+    pts = np.concatenate([np.concatenate([w.ptsX] + t.pts) for w, t, b in bodies])
+    if isinstance(dom, d.Box):
+        lo = np.array([p['xoBox'], -np.inf, p['zoBox']])
+        hi = np.array([p['xfBox'], p['yfBox'], p['zfBox']])
+        errs += outside(pts, lo, hi, 'bodies')
+        if hasattr(wake, 'pts'):
+            errs += outside(wake.pts[0], lo, hi, 'wake', [2]) # on the box faces along x and y
+        te = np.concatenate([w.ptsX[w.ptr[:-1],0] for w, t, b in bodies])
+        if not np.max(te) < p['xfBox']:
+            errs.append('"xfBox" ({0:f}) should be downstream of the trailing edge ({1:f})'.format(p['xfBox'], np.max(te)))
+    elif isinstance(dom, d.Sphere):
+        r = np.linalg.norm(pts - dom.pts[0][0,:], axis=1)
+        if not np.max(r) < p['rSphere']:
+            errs.append('"rSphere" ({0:f}) should be larger than the distance from the root TE to the farthest body point ({1:f})'.format(p['rSphere'], np.max(r)))
+    return errs
+
+def check(p, wing, tip, wake, dom):
+    """Raise an exception listing all the errors found in the components built from a parameter dictionary
+    """
+    report(errors(p, wing, tip, wake, dom))
+
+def report(errs):
+    """Raise an exception listing errors, if any
+    """
+    if errs:
+        raise Exception('validate: invalid geometry!\n' + ''.join([' - ' + e + '\n' for e in errs]))
+
+def slopes(wing, nSlope):
+    """Return the errors of the points defining the TE slopes of the wake, which should lie on each side of the stations
+    """
+    nLe = wing.sptsNl[:,3]
+    nPts = np.diff(wing.ptr)
+    bad = np.flatnonzero((nSlope >= nLe) | (nSlope >= nPts-1-nLe))
+    return ['"nSlope" ({0:d}) should be smaller than the number of points of each side of station {1:d} ({2:d} upper, {3:d} lower)'.format(nSlope, i, nLe[i], nPts[i]-1-nLe[i]) for i in bad]
+
+def airfoil(pts, chord, twist):
+    """Return the errors of a transformed airfoil: non-finite or duplicate points, open TE,
+    points not Selig-ordered (from the TE, along the upper side to the LE, and back along the lower side), and self-intersection
+    """
+    errs = []
+    if not np.all(np.isfinite(pts)):
+        return ['points are not finite']
+    xz = pts[:,[0,2]]
+    dup = np.flatnonzero(np.all(xz[1:] == xz[:-1], axis=1))
+    if dup.shape[0]:
+        errs.append('duplicate consecutive points at {0:s}'.format(str(dup[0:10].tolist())))
+    gap = np.linalg.norm(xz[0] - xz[-1])
+    if gap > _tol*chord:
+        errs.append('airfoil is not closed at the TE (gap of {0:f})'.format(gap))
+    # chordwise coordinate, in the frame of the airfoil (before twist)
+    t = twist*np.pi/180
+    a = (xz[:,0]*np.cos(t) - xz[:,1]*np.sin(t)) / chord
+    if a[0] < np.max(a) - _tol or a[-1] < np.max(a) - _tol:
+        errs.append('airfoil does not start and end at the TE (Selig format expected)')
+    elif 0.5*np.sum(xz[:-1,0]*xz[1:,1] - xz[1:,0]*xz[:-1,1]) <= 0:
+        errs.append('airfoil points run along the lower side first (Selig format expected)')
+    ij = crossing(xz)
+    if ij is not None:
+        errs.append('airfoil self-intersects (segments {0:d} and {1:d})'.format(ij[0], ij[1]))
+    return errs
+
+def crossing(xz, block=100000):
+    """Return the first pair of non-adjacent segments of a closed polyline which cross each other, None if there is none
+    Only the pairs of segments whose x-intervals overlap are tested, found by sweeping the segments sorted by their lower x bound,
+    by blocks of at most about block pairs (a few per segment for an airfoil, instead of all the pairs)
+    """
+    x, z = xz[:-1,0], xz[:-1,1]
+    ux, uz = np.diff(xz[:,0]), np.diff(xz[:,1])
+    m = x.shape[0]
+    if m < 3:
+        return None
+    lo = np.minimum(xz[:-1,0], xz[1:,0])
+    hi = np.maximum(xz[:-1,0], xz[1:,0])
+    order = np.argsort(lo, kind='stable')
+    # number of segments starting after each segment in the sweep, before its upper x bound
+    cnt = np.maximum(np.searchsorted(lo[order], hi[order], side='right') - np.arange(1, m+1), 0)
+    cum = np.cumsum(cnt)
+    best = None
+    s = 0
+    while s < m:
+        e = min(m, max(s+1, int(np.searchsorted(cum, (cum[s-1] if s else 0) + block, side='right'))))
+        c = cnt[s:e]
+        ps = np.repeat(np.arange(s, e), c)
+        pe = ps + 1 + np.arange(ps.shape[0]) - np.repeat(np.cumsum(c) - c, c)
+        i = np.minimum(order[ps], order[pe])
+        j = np.maximum(order[ps], order[pe])
+        # orientation of the ends of segment j with respect to segment i, and conversely
+        xi, zi, uxi, uzi = x[i], z[i], ux[i], uz[i]
+        xj, zj, uxj, uzj = x[j], z[j], ux[j], uz[j]
+        d1 = uxi*(zj - zi) - uzi*(xj - xi)
+        d2 = uxi*(zj + uzj - zi) - uzi*(xj + uxj - xi)
+        d3 = uxj*(zi - zj) - uzj*(xi - xj)
+        d4 = uxj*(zi + uzi - zj) - uzj*(xi + uxi - xj)
+        hit = np.flatnonzero((d1*d2 < 0) & (d3*d4 < 0) & (j > i+1) & ~((i == 0) & (j == m-1)))
+        if hit.shape[0]:
+            k = hit[np.argmin(i[hit]*m + j[hit])]
+            if best is None or i[k]*m + j[k] < best[0]*m + best[1]:
+                best = (int(i[k]), int(j[k]))
+        s = e
+    return best
+
+def separations(w, t):
+    """Return the errors of the separation points of the stations and of the wingtip, which should be distinct and ordered
+    """
+    errs = []
+    names = ['TE', 'upper TE', 'upper LE', 'LE', 'lower LE', 'lower TE']
+    spts = w.sptsNl
+    nPts = np.diff(w.ptr)
+    bad = np.argwhere(np.diff(spts, axis=1) <= 0)
+    for i, k in bad:
+        errs.append('{0:s} station {1:d}: {2:s} and {3:s} separation points coincide or are swapped (points {4:d} and {5:d}), the airfoil is too coarse'.format(w.name, i, names[k], names[k+1], spts[i,k], spts[i,k+1]))
+    for i in np.flatnonzero(spts[:,5] >= nPts-1):
+        errs.append('{0:s} station {1:d}: lower TE separation point coincides with the TE, the airfoil is too coarse'.format(w.name, i))
+    s = t.sptsN[0]
+    if not (0 <= s[0] < s[1] < t.pts[0].shape[0]):
+        errs.append('{0:s} wingtip: separation points coincide or are swapped (points {1:d} and {2:d} of {3:d}), the tip airfoil is too coarse'.format(w.name, s[0], s[1], t.pts[0].shape[0]))
+    return errs
+
+def outside(pts, lo, hi, name, axes=[0, 1, 2]):
+    """Return the errors of points lying outside a box, or on its faces, along some axes
+    """
+    errs = []
+    for k in axes:
+        bad = np.flatnonzero(~((pts[:,k] > lo[k]) & (pts[:,k] < hi[k])))
+        if bad.shape[0]:
+            errs.append('{0:s}: {1:d} points lie outside the box along {2:s} (e.g. {3:s}), within ({4:f}, {5:f})'.format(name, bad.shape[0], 'xyz'[k], str(pts[bad[0]].tolist()), lo[k], hi[k]))
+    return errs
@@ -29,11 +29,17 @@ import numpy as np
 #
 # Adrien Crovato
 class Wing:
-    def __init__(self, filenames, span, taper, sweep, dihedral, twist, rootChord, offset):
+    def __init__(self, airfoils, span, taper, sweep, dihedral, twist, rootChord, offset, _num, tol=None, nTe=0, name='wing', untwisted=False):
+        self.num = _num
+        # Find the separation points in the frame of the airfoils (before twist) rather than in the twisted frame,
+        # so that they do not depend on the twist (split mode, where twist edits must keep the topology)
+        self.untwisted = untwisted
+        # Name of the body (physical groups), and prefix of its mesh size constants (none for the main wing)
+        self.name = name
+        self.pfx = '' if name == 'wing' else name + '_'
+        self.tag = '' if name == 'wing' else ' ({0:s})'.format(name)
         # Number of airfoils
-        self.n = len(filenames)
-        if self.n > 10:
-            raise Exception('Wing: read {0:d} airfoils but a maximum of 10 is suppored!\n'.format(self.n))
+        self.n = len(airfoils)
 
         # Convert degrees to radians
         sweep = [x * np.pi/180 for x in sweep]
@@ -43,8 +49,8 @@ class Wing:
         # Compute wing shape parameters
         self.compShape(span, taper, rootChord)
 
-        # Create airfoil points and indices
-        self.initData(filenames, span, twist, sweep, dihedral, offset)
+        # Create airfoil points and indices, optionally simplifying the airfoils
+        self.initData(airfoils, span, twist, sweep, dihedral, offset, tol, nTe)
 
     def compShape(self, span, taper, rootChord):
         """Compute basic shape parameters of the wing
@@ -62,88 +68,97 @@ class Wing:
         self.b = sum(span)
         self.AR = 2 * self.b*self.b/self.S
 
-    def initData(self, filenames, span, twist, sweep, dihedral, offset):
-        """Read, transform and store airfoil points, and define numbering
+    def initData(self, airfoils, span, twist, sweep, dihedral, offset, tol=None, nTe=0):
+        """Transform and store airfoil points, and define numbering
         """
-        self.pts = []
-        self.ptsN = []
-        # read and store coordinates (10 airfoils of max. 499 points each: 1-5000)
-        for i in range(0, self.n):
-            aPts = self.read(filenames[i])
-            size = aPts.shape[0]
-            aPts = np.hstack((aPts, self.spanPos[i]*np.ones([size,1])))
-            aPts[:,[1,2]] = np.fliplr(aPts[:,[1,2]])
-            aIdx = np.arange(i*500+1, i*500+1+size)
-            self.pts.append(aPts)
-            self.ptsN.append(aIdx)
-        # transform coordinates
-        for i in range(0, self.n):
-            # apply taper (scaling)
-            self.pts[i][:, [0,2]] = self.pts[i][:, [0,2]]*self.chord[i]
-            # aplly twist (rotation)
-            self.pts[i][:, [0,2]] = np.dot(self.pts[i][:, [0,2]],np.array([[np.cos(twist[i]), -np.sin(twist[i])],[np.sin(twist[i]), np.cos(twist[i])]]))
-        for i in range(1, self.n):
-            # apply sweep (translation)
-            self.pts[i][:, 0] = self.pts[i][:, 0] + np.min(self.pts[i-1][:, 0]) + np.tan(sweep[i-1])*span[i-1]
-            # apply dihedral (translatation)
-            self.pts[i][:, 2] = self.pts[i][:, 2] + sum(np.tan(dihedral[0:i])*span[0:i])
-        for i in range(0, self.n):
-            # apply offset
-            self.pts[i][:, 0] += offset[0] # x
-            self.pts[i][:, 2] += offset[1] # z
-        # get separation points numbering
-        self.sptsNl = []
-        self.sptsNg = [] # todo: remove since global index can be recovered from local index: ptsN[local]
-        for i in range(0, self.n):
-            numb = self.specPts(i)
-            self.sptsNl.append(numb)
-            self.sptsNg.append(numb+i*500+1)
+        # transform all airfoils at once, and stack them (the points of station i being the rows ptr[i] to ptr[i+1] of ptsX)
+        self.twist = twist
+        self.ptr = np.cumsum([0] + [a.shape[0] for a in airfoils])
+        self.ptsX = transform(np.concatenate(airfoils), np.diff(self.ptr), self.chord, self.spanPos, twist, span, sweep, dihedral, offset)
+        # simplify airfoils
+        self.nPts = np.diff(self.ptr).tolist() # number of points read for each airfoil
+        self.tol = tol
+        if tol is not None:
+            spts = self.specPts()
+            keep = np.concatenate([self.simplify(i, tol, nTe, spts[i]) for i in range(0, self.n)])
+            self.ptsX = self.ptsX[keep, :]
+            self.ptr = np.append(0, np.cumsum(keep)[self.ptr[1:]-1])
+        # define point numbering (the last point of each station closes the airfoil on the TE, and shares its ID)
+        ids = self.num.points(self.ptr[-1] - self.n)
+        self.ptsId = np.insert(ids, self.ptr[1:] - np.arange(1, self.n+1), ids[self.ptr[:-1] - np.arange(0, self.n)])
+        # get separation points numbering (local index, the IDs being given by sepIds)
+        self.sptsNl = self.specPts()
 
-        # define line numbering (6 lines per airfoil: 1-60)
-        self.linaN = []
-        for i in range(0, self.n):
-            self.linaN.append(np.arange(i*6+1, (i+1)*6+1))
-        # define line numbering (6 lines per wing station: 61-114)
-        self.linpN = []
-        for i in range(0, self.n-1):
-            self.linpN.append(np.arange(i*6+61, (i+1)*6+61))
-        # define surface numbering (6 per wing station: 1-55)
-        self.surN = []
-        for i in range(0, self.n-1):
-            self.surN.append(np.arange(i*6+1, (i+1)*6+1))
+        # define line numbering (6 lines per airfoil)
+        self.linaN = self.num.lines(6*self.n).reshape(self.n, 6)
+        # define line numbering (6 lines per wing station)
+        self.linpN = self.num.lines(6*(self.n-1)).reshape(self.n-1, 6)
+        # define surface numbering (6 per wing station)
+        self.surN = self.num.surfaces(6*(self.n-1)).reshape(self.n-1, 6)
+
+    def station(self, i):
+        """Return the slice of the rows of ptsX and ptsId holding the points of station i
+        """
+        i = i % self.n
+        return slice(self.ptr[i], self.ptr[i+1])
 
-    def specPts(self, idx):
-        """Find (local) index and location of separation points
+    def sepIds(self):
+        """Return the IDs of the separation points of all the stations, as an array of n rows
+        """
+        return self.ptsId[self.ptr[:-1,None] + self.sptsNl]
+
+    def specPts(self):
+        """Find (local) index of separation points of all the airfoils, as an array of n rows
+        (TE, upper TE, upper LE, LE, lower LE and lower TE)
+        The points are found in the twisted frame, or in the frame of each airfoil (before twist) if untwisted
         """
         # fraction of the chord defining separation points (could be given as user-def params)
         sepFwd = 0.3
         sepAft = 0.9
-        # trailing and leading edge
-        te = 0
-        le = np.argmin(self.pts[idx][:,0])
+        # station of each point, and first and last+1 point of each station
+        sta = np.repeat(np.arange(self.n), np.diff(self.ptr))
+        start = self.ptr[:-1]
+        end = self.ptr[1:]
+        x = chordwise(self.ptsX, np.asarray(self.twist)[sta]) if self.untwisted else self.ptsX[:,0]
+        # trailing and leading edge (first minimum of x on each station)
+        te = np.zeros(self.n, dtype=int)
+        first = np.flatnonzero(x == np.minimum.reduceat(x, start)[sta])
+        le = first[np.searchsorted(first, start)] - start
+        # distance to the LE, decreasing on the upper side and increasing on the lower side (excluding the closing point)
+        x = x - x[start+le][sta]
+        sep = np.array([sepAft, sepFwd]) * np.array(self.chord)[:,None]
         # find upper separations
-        teU = np.argmin(np.abs(self.pts[idx][te:le,0]-self.pts[idx][le,0] - sepAft*self.chord[idx]))
-        leU = np.argmin(np.abs(self.pts[idx][te:le,0]-self.pts[idx][le,0] - sepFwd*self.chord[idx]))
+        up = nearest(-x, np.repeat(start, 2), np.repeat(start+le, 2), -sep.ravel()).reshape(-1, 2) - start[:,None]
         # find lower separations
-        leL = le + np.argmin(np.abs(self.pts[idx][le:-1,0]-self.pts[idx][le,0] - sepFwd*self.chord[idx]))
-        teL = le + np.argmin(np.abs(self.pts[idx][le:-1,0]-self.pts[idx][le,0] - sepAft*self.chord[idx]))
+        low = nearest(x, np.repeat(start+le, 2), np.repeat(end-1, 2), sep[:,::-1].ravel()).reshape(-1, 2) - start[:,None]
 
-        return np.array([te , teU, leU, le, leL, teL])
+        return np.column_stack((te, up, le, low))
 
-    def read(self,fname):
-        """Read data from file and stroe in matrix
+    def simplify(self, idx, tol, nTe, spts):
+        """Return the mask of the airfoil points kept within a geometric tolerance (in length units)
+        The TE, LE and separation points (spts), and the nTe points next to the TE, are always kept
+        Upper and lower points are kept by pairs, so that they still match for the wingtip mean line
         """
-        _file = open(fname, 'r')
-        label = next(_file).split(',')
-        _file.close()
-        data = np.loadtxt(fname, skiprows=1)
-        return data
+        pts = self.ptsX[self.station(idx), :][:, [0,2]]
+        keep = np.zeros(pts.shape[0], dtype=bool)
+        keep[spts] = True
+        keep[0:nTe+1] = True
+        keep[pts.shape[0]-nTe-1:] = True
+        # decimate the curve between each pair of consecutive kept points
+        anchors = np.flatnonzero(keep)
+        for j in range(0, anchors.shape[0]-1):
+            keep[anchors[j]:anchors[j+1]+1] |= decimate(pts[anchors[j]:anchors[j+1]+1, :], tol)
+        return keep | keep[::-1]
 
-    def writeInfo(self,fname):
+    def reduction(self):
+        """Return the total number of airfoil points read and kept
+        """
+        return sum(self.nPts), self.ptsX.shape[0]
+
+    def writeInfo(self, file):
         """Write wing geometrical parameters
         """
-        file = open(fname, 'a')
-        file.write('// --- Wing geometry ---\n')
+        file.write('// --- Wing geometry{0:s} ---\n'.format(self.tag))
         file.write('// Number of spanwise stations: {0:d}\n'.format(self.n))
         file.write('// Spanwise stations normalized coordinate: ')
         for p in self.spanPos:
@@ -156,117 +171,150 @@ class Wing:
         file.write('// Half-wing area: {0:f}\n'.format(self.S))
         file.write('// Half-wing span: {0:f}\n'.format(self.b))
         file.write('// Full-wing aspect ratio: {0:f}\n'.format(self.AR))
+        if self.tol is not None:
+            file.write('// Airfoils simplified within {0:f}: {2:d} of {1:d} points kept\n'.format(self.tol, *self.reduction()))
         file.write('\n')
-        file.close()
 
-    def writeOpts(self, fname):
+    def writeOpts(self, file):
         """Write wing gmsh options
         """
-        file = open(fname, 'a')
-        file.write('// --- Wing options ---\n')
+        file.write('// --- Wing options{0:s} ---\n'.format(self.tag))
         for i in range(0, self.n):
-            file.write('DefineConstant[ msLe{0:1d} = {{ {1:f}, Name "leading edge mesh size on {2:1d}th spanwise station" }} ];\n'.format(i, self.chord[i]/100, i))
-            file.write('DefineConstant[ msTe{0:1d} = {{ {1:f}, Name "trailing edge mesh size on {2:1d}th spanwise station" }} ];\n'.format(i, self.chord[i]/100, i))
-            file.write('DefineConstant[ gr{0:1d} = {{ {1:f}, Name "growth ratio for {2:1d}th spanwise station" }} ];\n'.format(i, 1.5, i))
+            file.constant('{0:s}msLe{1:d}'.format(self.pfx, i), self.chord[i]/100, 'leading edge mesh size on {0:d}th spanwise station{1:s}'.format(i, self.tag))
+            file.constant('{0:s}msTe{1:d}'.format(self.pfx, i), self.chord[i]/100, 'trailing edge mesh size on {0:d}th spanwise station{1:s}'.format(i, self.tag))
+            file.constant('{0:s}gr{1:d}'.format(self.pfx, i), 1.5, 'growth ratio for {0:d}th spanwise station{1:s}'.format(i, self.tag))
         file.write('\n')
-        file.close()
 
-    def writePoints(self,fname):
+    def writePoints(self, file):
         """Write wing points
         """
-        file = open(fname, 'a')
-        file.write('// --- Wing points ---\n')
+        file.write('// --- Wing points{0:s} ---\n'.format(self.tag))
         for i in range(0, self.n):
             file.write('// -- Airfoil {0:d}\n'.format(i))
-            # TE
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},msTe{4:d}}};\n'.format(self.ptsN[i][self.sptsNl[i][0]], self.pts[i][self.sptsNl[i][0],0], self.pts[i][self.sptsNl[i][0],1], self.pts[i][self.sptsNl[i][0],2], i))
-            for j in range(self.sptsNl[i][0]+1, self.sptsNl[i][1]):
-                file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[i][j], self.pts[i][j,0], self.pts[i][j,1], self.pts[i][j,2]))
-            # upper TE
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},gr{4:d}*msTe{4:d}}};\n'.format(self.ptsN[i][self.sptsNl[i][1]], self.pts[i][self.sptsNl[i][1],0], self.pts[i][self.sptsNl[i][1],1], self.pts[i][self.sptsNl[i][1],2], i))
-            for j in range(self.sptsNl[i][1]+1, self.sptsNl[i][2]):
-                file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[i][j], self.pts[i][j,0], self.pts[i][j,1], self.pts[i][j,2]))
-            # upper LE
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},gr{4:d}*msLe{4:d}}};\n'.format(self.ptsN[i][self.sptsNl[i][2]], self.pts[i][self.sptsNl[i][2],0], self.pts[i][self.sptsNl[i][2],1], self.pts[i][self.sptsNl[i][2],2], i))
-            for j in range(self.sptsNl[i][2]+1, self.sptsNl[i][3]):
-                file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[i][j], self.pts[i][j,0], self.pts[i][j,1], self.pts[i][j,2]))
-            # LE
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},msLe{4:d}}};\n'.format(self.ptsN[i][self.sptsNl[i][3]], self.pts[i][self.sptsNl[i][3],0], self.pts[i][self.sptsNl[i][3],1], self.pts[i][self.sptsNl[i][3],2], i))
-            for j in range(self.sptsNl[i][3]+1, self.sptsNl[i][4]):
-                file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[i][j], self.pts[i][j,0], self.pts[i][j,1], self.pts[i][j,2]))
-            # lower LE
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},gr{4:d}*msLe{4:d}}};\n'.format(self.ptsN[i][self.sptsNl[i][4]], self.pts[i][self.sptsNl[i][4],0], self.pts[i][self.sptsNl[i][4],1], self.pts[i][self.sptsNl[i][4],2], i))
-            for j in range(self.sptsNl[i][4]+1, self.sptsNl[i][5]):
-                file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[i][j], self.pts[i][j,0], self.pts[i][j,1], self.pts[i][j,2]))
-            # lower TE
-            file.write('Point({0:d}) = {{{1:f},{2:f},{3:f},gr{4:d}*msTe{4:d}}};\n'.format(self.ptsN[i][self.sptsNl[i][5]], self.pts[i][self.sptsNl[i][5],0], self.pts[i][self.sptsNl[i][5],1], self.pts[i][self.sptsNl[i][5],2], i))
-            for j in range(self.sptsNl[i][5]+1, self.ptsN[i].shape[0]-1):
-                file.write('Point({0:d}) = {{{1:f},{2:f},{3:f}}};\n'.format(self.ptsN[i][j], self.pts[i][j,0], self.pts[i][j,1], self.pts[i][j,2]))
+            # mesh size at TE, upper TE, upper LE, LE, lower LE and lower TE
+            s = self.station(i)
+            sfx = np.full(s.stop-s.start-1, '', dtype=object)
+            sfx[self.sptsNl[i]] = [m.format(i, self.pfx) for m in ['{1:s}msTe{0:d}', '{1:s}gr{0:d}*{1:s}msTe{0:d}', '{1:s}gr{0:d}*{1:s}msLe{0:d}', '{1:s}msLe{0:d}', '{1:s}gr{0:d}*{1:s}msLe{0:d}', '{1:s}gr{0:d}*{1:s}msTe{0:d}']]
+            file.points(self.ptsId[s][:-1], self.ptsX[s][:-1,:], sfx)
         file.write('\n')
-        file.close()
 
-    def writeLines(self, fname):
+    def writeLines(self, file):
         """Write wing lines
         """
-        file = open(fname, 'a')
-        file.write('// --- Wing lines ---\n')
+        file.write('// --- Wing lines{0:s} ---\n'.format(self.tag))
         # airfoil lines
         for i in range(0, self.n):
             file.write('// -- Airfoil {0:d}\n'.format(i))
+            ids = self.ptsId[self.station(i)]
             for j in range(0, self.linaN[i].shape[0]-1):
-                file.write('Spline({0:d}) = {{'.format(self.linaN[i][j]))
-                for k in range(self.sptsNg[i][j], self.sptsNg[i][j+1]):
-                    file.write('{0:d}, '.format(k))
-                file.write('{0:d}'.format(self.sptsNg[i][j+1]))
-                file.write('};\n')
-            file.write('Spline({0:d}) = {{'.format(self.linaN[i][-1]))
-            for k in range(self.sptsNg[i][self.linaN[i].shape[0]-1], self.sptsNg[i][0]+self.ptsN[i].shape[0]-1):
-                file.write('{0:d}, '.format(k))
-            file.write('{0:d}'.format(self.sptsNg[i][0]))
-            file.write('};\n')
+                file.spline(self.linaN[i][j], ids[self.sptsNl[i][j]:self.sptsNl[i][j+1]+1])
+            file.spline(self.linaN[i][-1], ids[self.sptsNl[i][-1]:])
         # planform lines
+        spts = self.sepIds()
         for i in range(0, self.n-1):
             file.write('// -- Planform {0:d}\n'.format(i))
             for j in range(0, self.linpN[i].shape[0]):
-                file.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(self.linpN[i][j], self.sptsNg[i][j], self.sptsNg[i+1][j]))
+                file.line(self.linpN[i][j], spts[i][j], spts[i+1][j])
         file.write('\n')
-        file.close()
 
-    def writeSurfaces(self, fname):
+    def writeSurfaces(self, file):
         """Write wing line loops and surfaces
         """
-        file = open(fname, 'a')
-        file.write('// --- Wing line loops and surfaces ---\n')
+        file.write('// --- Wing line loops and surfaces{0:s} ---\n'.format(self.tag))
         for i in range(0, self.n-1):
             file.write('// -- Planform {0:d}\n'.format(i))
             for j in range(0, self.surN[i].shape[0]):
-                file.write('Line Loop({0:d}) = {{{1:d},{2:d},{3:d},{4:d}}};\n'.format(self.surN[i][j], self.linaN[i][j], self.linpN[i][np.mod(j+1,self.linpN[i].shape[0])], -self.linaN[i+1][j], -self.linpN[i][j]))
+                file.loop(self.surN[i][j], [self.linaN[i][j], self.linpN[i][np.mod(j+1,self.linpN[i].shape[0])], -self.linaN[i+1][j], -self.linpN[i][j]])
             for j in range(0, self.surN[i].shape[0]):
-                file.write('Surface({0:d}) = {{-{0:d}}};\n'.format(self.surN[i][j]))
+                file.surface(self.surN[i][j], [-self.surN[i][j]])
         file.write('\n')
-        file.close()
 
-    def writePhysical(self, fname):
+    def writePhysical(self, file):
         """Write wing physical groups
         """
-        import os
-        file = open(fname, 'a')
-        file.write('// --- Wing physical groups ---\n')
-        file.write('Physical Surface("wing") = {')
-        for i in range(0, self.n-1):
-            for j in range(0, 3):
-                file.write('{0:d},'.format(self.surN[i][j]))
-        file.seek(0, os.SEEK_END) # first seek end of file; f.seek(0, 2) is legal
-        file.seek(file.tell() - 1, os.SEEK_SET) # then go backward
-        file.truncate()
-        file.write('};\n')
-        file.write('Physical Surface("wing_") = {')
-        for i in range(0, self.n-1):
-            for j in range(3, 6):
-                file.write('{0:d},'.format(self.surN[i][j]))
-        file.seek(0, os.SEEK_END)
-        file.seek(file.tell() - 1, os.SEEK_SET)
-        file.truncate()
-        file.write('};\n')
+        file.write('// --- Wing physical groups{0:s} ---\n'.format(self.tag))
+        file.physical('Surface', self.name, [self.surN[i][j] for i in range(0, self.n-1) for j in range(0, 3)])
+        file.physical('Surface', self.name + '_', [self.surN[i][j] for i in range(0, self.n-1) for j in range(3, 6)])
         file.write('\n')
-        file.close()
+
+def chordwise(pts, twist):
+    """Return the chordwise coordinate of points of twisted airfoils, in the frame of the airfoils (up to a translation)
+    """
+    return pts[:,0]*np.cos(twist) - pts[:,2]*np.sin(twist)
+
+def decimate(pts, tol):
+    """Return the mask of the points of a curve kept by the Douglas-Peucker algorithm,
+    so that the removed points lie within tol of the polyline through the kept points
+    """
+    keep = np.zeros(pts.shape[0], dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, pts.shape[0]-1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        d = pts[b, :] - pts[a, :]
+        r = pts[a+1:b, :] - pts[a, :]
+        l = np.hypot(d[0], d[1])
+        if l > 0:
+            dist = np.abs(r[:,0]*d[1] - r[:,1]*d[0]) / l
+        else:
+            dist = np.hypot(r[:,0], r[:,1])
+        k = np.argmax(dist)
+        if dist[k] > tol:
+            keep[a+1+k] = True
+            stack.append((a, a+1+k))
+            stack.append((a+1+k, b))
+    return keep
+
+def nearest(x, lo, hi, v):
+    """Return, for each segment k, the index of the first value of x[lo[k]:hi[k]] closest to v[k],
+    as lo[k] + np.argmin(np.abs(x[lo[k]:hi[k]] - v[k])) would
+    Sorted (increasing) segments are all searched at once by bisection, the others are scanned
+    """
+    lo = np.asarray(lo)
+    hi = np.asarray(hi)
+    v = np.asarray(v, dtype=float)
+    last = x.shape[0] - 1
+    # first index a such that x[a] >= v
+    a, b = lo.copy(), hi.copy()
+    while np.any(a < b):
+        act = a < b
+        mid = (a + b) // 2
+        right = act & (x[np.minimum(mid, last)] < v)
+        a = np.where(right, mid+1, a)
+        b = np.where(act & ~right, mid, b)
+    # closest of the values on each side of v, the one before in case of tie
+    dPrev = np.where(a > lo, np.abs(x[np.maximum(a-1, 0)] - v), np.inf)
+    dNext = np.where(a < hi, np.abs(x[np.minimum(a, last)] - v), np.inf)
+    k = np.where(dPrev <= dNext, a-1, a)
+    d = np.minimum(dPrev, dNext)
+    # first of the (repeated) closest values
+    prev = (k > lo) & (np.abs(x[np.maximum(k-1, 0)] - v) == d)
+    while np.any(prev):
+        k = np.where(prev, k-1, k)
+        prev &= (k > lo) & (np.abs(x[np.maximum(k-1, 0)] - v) == d)
+    # unsorted segments
+    dec = np.append(0, np.cumsum(np.diff(x) < 0)) # number of decreases up to each value
+    for j in np.flatnonzero(dec[np.maximum(hi-1, lo)] > dec[lo]):
+        k[j] = lo[j] + np.argmin(np.abs(x[lo[j]:hi[j]] - v[j]))
+    return k
+
+def transform(pts, sizes, chord, spanPos, twist, span, sweep, dihedral, offset):
+    """Return the coordinates of a stack of airfoils (Selig formatted, of possibly different sizes)
+    scaled, twisted, swept, raised (dihedral) and offset as the stations of a wing
+    All the stations are transformed at once, the ith airfoil spanning sizes[i] consecutive rows of pts
+    """
+    n = len(sizes)
+    sta = np.repeat(np.arange(n), sizes) # station of each point
+    start = np.cumsum(np.append(0, sizes[:-1])) # first point of each station
+    # apply taper (scaling) and twist (rotation)
+    c = (np.cos(twist) * chord)[sta]
+    s = (np.sin(twist) * chord)[sta]
+    x = pts[:,0]*c + pts[:,1]*s
+    z = -pts[:,0]*s + pts[:,1]*c
+    # apply sweep (translation, the LE of each station being moved behind the LE of the previous one) and dihedral (translation)
+    dx = np.cumsum(np.append(0., np.minimum.reduceat(x, start)[:-1] + np.tan(sweep)*np.asarray(span)))
+    dz = np.cumsum(np.append(0., np.tan(dihedral)*np.asarray(span)))
+    # apply offset
+    return np.column_stack((x + (dx + offset[0])[sta], np.asarray(spanPos)[sta], z + (dz + offset[1])[sta]))
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+Copyright 2020 University of Liege
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+## @package GeoGen (CFD basic grid creator)
+#
+# Create an unstructured tetrahedral grid around a wing
+# to be meshed with gmsh for Flow or SU2 CFD solvers
+# Adrien Crovato
+
+import numpy as np
+
+## Generic writer class
+# Components describe their entities through this interface,
+# which is implemented by the text (.geo) and gmsh API backends
+#
+# Adrien Crovato
+class Writer:
+    def __init__(self, fname=None):
+        self.fname = fname # output file (None for in-memory only)
+
+    def ids(self, ids):
+        """Return a comma-separated list of entity IDs
+        """
+        return ','.join(['{0:d}'.format(i) for i in ids])
+
+    def write(self, txt):
+        """Desc.
+        """
+
+    def constant(self, name, val, label):
+        """Desc.
+        """
+
+    def points(self, ids, pts, sfx=''):
+        """Desc.
+        """
+
+    def spline(self, id, ids):
+        """Desc.
+        """
+
+    def line(self, id, a, b):
+        """Desc.
+        """
+
+    def circle(self, id, a, c, b):
+        """Desc.
+        """
+
+    def loop(self, id, lines):
+        """Desc.
+        """
+
+    def surface(self, id, loops):
+        """Desc.
+        """
+
+    def planeSurface(self, id, loops):
+        """Desc.
+        """
+
+    def surfaceLoop(self, id, surfs):
+        """Desc.
+        """
+
+    def volume(self, id, sloops):
+        """Desc.
+        """
+
+    def physical(self, kind, name, ids, append=False):
+        """Desc.
+        """
+
+    def option(self, name, val, comment=''):
+        """Desc.
+        """
+
+    def meshAlgorithm(self, surfs, val, comment=''):
+        """Desc.
+        """
+
+    def field(self, id, kind, opts):
+        """Desc.
+        """
+
+    def backgroundField(self, id):
+        """Desc.
+        """
+
+    def close(self):
+        """Desc.
+        """
+
+## Buffered gmsh geometry (.geo) writer shared by all components
+#
+# Adrien Crovato
+class GeoWriter(Writer):
+    def __init__(self, fname=None, stream=None, bufSize=1024*1024):
+        import io
+        Writer.__init__(self, fname)
+        self.buf = []
+        self.size = 0 # size of the buffered text
+        self.stream = stream # text or binary stream the buffer is flushed to when larger than bufSize (kept in memory if None)
+        self.bufSize = bufSize
+        self.binary = isinstance(stream, (io.RawIOBase, io.BufferedIOBase)) # encode the text for binary streams
+
+    def write(self, txt):
+        """Append text to the buffer
+        """
+        self.buf.append(txt)
+        self.size += len(txt)
+        if self.stream is not None and self.size > self.bufSize:
+            self.flush()
+
+    def constant(self, name, val, label):
+        """Write a user-definable constant
+        """
+        self.write('DefineConstant[ {0:s} = {{ {1:f}, Name "{2:s}" }} ];\n'.format(name, val, label))
+
+    def points(self, ids, pts, sfx=''):
+        """Write Point records for a set of IDs and coordinates in one pass
+        sfx is either a single mesh size expression, or an array holding one expression per point ('' for none)
+        """
+        n = len(ids)
+        if n == 0:
+            return
+        args = np.empty([n, 5], dtype=object)
+        args[:,0] = np.asarray(ids).tolist()
+        args[:,1:4] = np.asarray(pts).tolist()
+        if isinstance(sfx, str):
+            args[:,4] = ',' + sfx if sfx else ''
+        else:
+            sfx = np.asarray(sfx, dtype=object)
+            mask = sfx != ''
+            args[:,4] = ''
+            args[mask,4] = ',' + sfx[mask]
+        self.write(('Point(%d) = {%f,%f,%f%s};\n' * n) % tuple(args.ravel().tolist()))
+
+    def spline(self, id, ids):
+        """Write a Spline record through a set of point IDs (array, list or range)
+        """
+        if isinstance(ids, np.ndarray):
+            ids = ids.tolist()
+        self.write('Spline({0:d}) = {{{1:s}}};\n'.format(id, ', '.join(map(str, ids))))
+
+    def line(self, id, a, b):
+        """Write a straight Line record between two points
+        """
+        self.write('Line({0:d}) = {{{1:d},{2:d}}};\n'.format(id, a, b))
+
+    def circle(self, id, a, c, b):
+        """Write a Circle arc record from a to b, centered on c
+        """
+        self.write('Circle({0:d}) = {{{1:d},{2:d},{3:d}}};\n'.format(id, a, c, b))
+
+    def loop(self, id, lines):
+        """Write a Line Loop record through a set of (signed) line IDs
+        """
+        self.write('Line Loop({0:d}) = {{{1:s}}};\n'.format(id, self.ids(lines)))
+
+    def surface(self, id, loops):
+        """Write a (filling) Surface record bounded by a set of (signed) line loop IDs
+        """
+        self.write('Surface({0:d}) = {{{1:s}}};\n'.format(id, self.ids(loops)))
+
+    def planeSurface(self, id, loops):
+        """Write a Plane Surface record bounded by a set of line loop IDs
+        """
+        self.write('Plane Surface({0:d}) = {{{1:s}}};\n'.format(id, self.ids(loops)))
+
+    def surfaceLoop(self, id, surfs):
+        """Write a Surface Loop record through a set of surface IDs
+        """
+        self.write('Surface Loop({0:d}) = {{{1:s}}};\n'.format(id, self.ids(surfs)))
+
+    def volume(self, id, sloops):
+        """Write a Volume record bounded by a set of surface loop IDs
+        """
+        self.write('Volume({0:d}) = {{{1:s}}};\n'.format(id, self.ids(sloops)))
+
+    def physical(self, kind, name, ids, append=False):
+        """Write a Physical group record of a given kind (Line, Surface or Volume), or append to it
+        """
+        self.write('Physical {0:s}("{1:s}") {2:s} {{{3:s}}};\n'.format(kind, name, '+=' if append else '=', self.ids(ids)))
+
+    def option(self, name, val, comment=''):
+        """Write a gmsh (integer) option
+        """
+        self.write('{0:s} = {1:d};{2:s}\n'.format(name, val, ' // ' + comment if comment else ''))
+
+    def meshAlgorithm(self, surfs, val, comment=''):
+        """Write the 2D meshing algorithm to be used on some surfaces
+        """
+        self.write('MeshAlgorithm Surface {{{0:s}}} = {1:d};{2:s}\n'.format(self.ids(surfs), val, ' // ' + comment if comment else ''))
+
+    def field(self, id, kind, opts):
+        """Write a mesh size Field record of a given kind (Distance, Threshold, Box, Min...) and its options
+        opts is a list of (name, value) pairs, the values being numbers, mesh size expressions or lists of IDs
+        """
+        self.write('Field[{0:d}] = {1:s};\n'.format(id, kind))
+        for name, val in opts:
+            if isinstance(val, (list, tuple, np.ndarray)):
+                val = '{' + self.ids(val) + '}'
+            elif isinstance(val, (int, np.integer)):
+                val = '{0:d}'.format(val)
+            elif not isinstance(val, str):
+                val = '{0:f}'.format(val)
+            self.write('Field[{0:d}].{1:s} = {2:s};\n'.format(id, name, val))
+
+    def backgroundField(self, id):
+        """Write the field used as background mesh size
+        """
+        self.write('Background Field = {0:d};\n'.format(id))
+
+    def flush(self):
+        """Write the buffered text to the stream
+        """
+        txt = self.getvalue()
+        self.stream.write(txt.encode() if self.binary else txt)
+        self.buf = []
+        self.size = 0
+
+    def getvalue(self):
+        """Return the buffered text
+        """
+        return ''.join(self.buf)
+
+    def close(self):
+        """Flush the buffer to a temporary file next to the output, then rename it atomically
+        The buffered records are written one by one, without joining them into one string, and then released
+        """
+        import os, uuid
+        if self.stream is not None:
+            self.flush()
+        if self.fname is None:
+            return
+        dname, bname = os.path.split(os.path.abspath(self.fname))
+        tmp = os.path.join(dname, '.{0}.{1}.tmp'.format(bname, uuid.uuid4().hex))
+        try:
+            file = open(tmp, 'x')
+            file.writelines(self.buf)
+            file.close()
+            self.buf = []
+            self.size = 0
+            os.replace(tmp, self.fname)
+        except:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+## Gmsh API writer
+# Send the entities straight to the geo kernel of the gmsh python module,
+# then write the model (.geo_unrolled, .brep...) or mesh it (.msh) on close
+#
+# Adrien Crovato
+class GmshWriter(Writer):
+    def __init__(self, fname=None, name='geoGen'):
+        Writer.__init__(self, fname)
+        try:
+            import gmsh
+        except ImportError:
+            raise Exception('GmshWriter: the gmsh python module is required by the gmsh backend!\n')
+        self.gmsh = gmsh
+        self.init = not gmsh.isInitialized() # gmsh is finalized after writing only if initialized here
+        if self.init:
+            gmsh.initialize()
+        gmsh.model.add(name)
+        self.geo = gmsh.model.geo
+        self.consts = {} # values of user-definable constants
+        self.groups = {} # physical groups, indexed by (dimension, name)
+        self.algos = [] # 2D meshing algorithms, applied after synchronization
+
+    def size(self, expr):
+        """Evaluate a mesh size expression (product of constants)
+        """
+        if not expr:
+            return 0.
+        val = 1.
+        for c in expr.split('*'):
+            val *= self.consts[c]
+        return val
+
+    def constant(self, name, val, label):
+        """Store a user-definable constant
+        """
+        self.consts[name] = val
+
+    def points(self, ids, pts, sfx=''):
+        """Add points
+        """
+        if isinstance(sfx, str):
+            lc = np.full(len(ids), self.size(sfx))
+        else:
+            sfx = np.asarray(sfx, dtype=object)
+            lc = np.zeros(len(ids))
+            for expr in set(sfx.tolist()):
+                lc[sfx == expr] = self.size(expr)
+        for id, p, s in zip(np.asarray(ids).tolist(), np.asarray(pts).tolist(), lc.tolist()):
+            self.geo.addPoint(p[0], p[1], p[2], s, id)
+
+    def spline(self, id, ids):
+        """Add a spline
+        """
+        self.geo.addSpline(list(ids), id)
+
+    def line(self, id, a, b):
+        """Add a straight line
+        """
+        self.geo.addLine(a, b, id)
+
+    def circle(self, id, a, c, b):
+        """Add a circle arc
+        """
+        self.geo.addCircleArc(a, c, b, id)
+
+    def loop(self, id, lines):
+        """Add a curve loop
+        """
+        self.geo.addCurveLoop([int(l) for l in lines], id)
+
+    def surface(self, id, loops):
+        """Add a filling surface
+        """
+        self.geo.addSurfaceFilling([int(l) for l in loops], id)
+
+    def planeSurface(self, id, loops):
+        """Add a plane surface
+        """
+        self.geo.addPlaneSurface([int(l) for l in loops], id)
+
+    def surfaceLoop(self, id, surfs):
+        """Add a surface loop
+        """
+        self.geo.addSurfaceLoop([int(s) for s in surfs], id)
+
+    def volume(self, id, sloops):
+        """Add a volume
+        """
+        self.geo.addVolume([int(s) for s in sloops], id)
+
+    def physical(self, kind, name, ids, append=False):
+        """Store a physical group, created on close
+        """
+        key = ({'Line': 1, 'Surface': 2, 'Volume': 3}[kind], name)
+        if not append:
+            self.groups[key] = []
+        self.groups[key] += [int(i) for i in ids]
+
+    def option(self, name, val, comment=''):
+        """Set a gmsh option
+        """
+        self.gmsh.option.setNumber(name, val)
+
+    def meshAlgorithm(self, surfs, val, comment=''):
+        """Store the 2D meshing algorithm to be used on some surfaces
+        """
+        self.algos.append(([int(s) for s in surfs], val))
+
+    def field(self, id, kind, opts):
+        """Add a mesh size field and set its options
+        """
+        self.gmsh.model.mesh.field.add(kind, id)
+        for name, val in opts:
+            if isinstance(val, str):
+                self.gmsh.model.mesh.field.setNumber(id, name, self.size(val))
+            elif isinstance(val, (list, tuple, np.ndarray)):
+                self.gmsh.model.mesh.field.setNumbers(id, name, [int(v) for v in val])
+            else:
+                self.gmsh.model.mesh.field.setNumber(id, name, val)
+
+    def backgroundField(self, id):
+        """Set the field used as background mesh size
+        """
+        self.gmsh.model.mesh.field.setAsBackgroundMesh(id)
+
+    def close(self):
+        """Synchronize the model, create physical groups, and write the model or its mesh
+        Without output file, the model is left in the gmsh session for further use
+        """
+        import os
+        self.geo.synchronize()
+        for (dim, name), tags in self.groups.items():
+            tag = self.gmsh.model.addPhysicalGroup(dim, tags)
+            self.gmsh.model.setPhysicalName(dim, tag, name)
+        for surfs, val in self.algos:
+            for s in surfs:
+                self.gmsh.model.mesh.setAlgorithm(2, s, val)
+        if self.fname is not None:
+            if os.path.splitext(self.fname)[1] == '.msh':
+                self.gmsh.model.mesh.generate(3)
+            self.gmsh.write(self.fname)
+            if self.init:
+                self.gmsh.finalize()